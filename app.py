@@ -1,7 +1,23 @@
+import atexit
+import io
+import json
+import mimetypes
 import os
-from flask import Flask, send_from_directory, request, jsonify
+import re
+import threading
+import time
+from flask import Flask, Response, abort, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pandas as pd
+
+from data_cache import DATA_FILES, build_snapshot
+from data_snapshot import SnapshotStore
+from instrumentation import REGISTRY, SIZE_BUCKETS, SamplingProfiler
+from norms import NormsStore
+from prepared_response import PreparedResponse
+from result_cache import ResultCache, SQLiteCacheBackend, answers_key, pack_scores, unpack_scores
+from sessions import MemorySessionStore, SQLiteSessionStore
+from submissions import SubmissionLog, open_submission_sink
+from scoring import score_answer_matrix, score_answers, build_results
 
 # -----------------------------
 # Flask App Setup
@@ -15,289 +31,167 @@ CORS(app)  # Allow React frontend to call API
 # Folder where your React build is located
 FRONTEND_BUILD_FOLDER = "client/build"
 
-# CSV file names — MUST EXACTLY MATCH your uploaded files in repo
-QUESTIONS_FILE = "LRS_Beta_QA.csv"
-WEIGHT_MAP_FILE = "LRS_BETA_Weighted_Score_Map.csv"
-SCHEMA_INFO_FILE = "LRS_Beta_Young_18_Schemas.csv"
+# Cache-Control for the React build: files under static/ whose names carry a
+# content hash (main.1a2b3c4d.js) never change; everything else revalidates
+STATIC_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_CACHE_CONTROL = "public, no-cache"
+HASHED_ASSET_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+
+# Seconds between data file change checks (0 disables hot reload)
+DATA_RELOAD_INTERVAL = float(os.environ.get('DATA_RELOAD_INTERVAL', 5))
+
+# Opt-in sampling profiler: when enabled, a request carrying PROFILE_HEADER
+# is sampled and its collapsed stacks are written to PROFILE_DIR
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+PROFILE_HEADER = 'X-LRS-Profile'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+
+# Result cache for repeated answer sets (size 0 disables it). Set
+# RESULT_CACHE_DB to a SQLite file to share hits between workers.
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 10000))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_DB = os.environ.get('RESULT_CACHE_DB')
+
+# Incremental scoring sessions expire after SESSION_TTL idle seconds. They
+# live in the SESSION_DB SQLite file so every gunicorn worker sees them; an
+# empty SESSION_DB keeps them in process memory (single process only).
+SESSION_TTL = float(os.environ.get('SESSION_TTL', 1800))
+SESSION_DB = os.environ.get('SESSION_DB', 'sessions.db')
+
+# Population norms: percentiles and z-scores appear once a schema has seen
+# NORMS_MIN_COUNT results. The NORMS_DB SQLite file persists them and merges
+# the workers' sketches every NORMS_FLUSH_INTERVAL seconds; an empty
+# NORMS_DB keeps per-process norms in memory only.
+NORMS_MIN_COUNT = int(os.environ.get('NORMS_MIN_COUNT', 100))
+NORMS_DB = os.environ.get('NORMS_DB', 'norms.db')
+NORMS_FLUSH_INTERVAL = float(os.environ.get('NORMS_FLUSH_INTERVAL', 10))
+
+# Scored submissions are stored in SUBMISSION_STORE (SQLite, or JSONL when
+# the name ends in .jsonl; unset disables it) by a background writer that
+# commits every SUBMISSION_BATCH_SIZE records or SUBMISSION_FLUSH_INTERVAL
+# seconds. Submissions beyond SUBMISSION_QUEUE_SIZE pending are dropped.
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
+SUBMISSION_QUEUE_SIZE = int(os.environ.get('SUBMISSION_QUEUE_SIZE', 10000))
+SUBMISSION_BATCH_SIZE = int(os.environ.get('SUBMISSION_BATCH_SIZE', 500))
+SUBMISSION_FLUSH_INTERVAL = float(os.environ.get('SUBMISSION_FLUSH_INTERVAL', 1.0))
 
 # -----------------------------
-# DATA LOADER (safe for CSV or misnamed XLSX)
+# DATA SNAPSHOT (loaded at startup, hot reloaded on file changes)
+#
+# Built from the binary data cache when it matches the current data files
+# (see data_cache.py); only a missing or stale cache parses the CSVs.
 # -----------------------------
-def load_data_file(filename):
-    if not os.path.exists(filename):
-        print(f"File not found: {filename}")
-        return None
-    try:
-        return pd.read_csv(filename)
-    except Exception as e1:
-        print(f"CSV read failed for {filename}: {e1}")
-        try:
-            return pd.read_excel(filename)
-        except Exception as e2:
-            print(f"Excel read also failed for {filename}: {e2}")
-            return None
+data_store = SnapshotStore(DATA_FILES, build_snapshot, interval=DATA_RELOAD_INTERVAL)
+
+
+@app.before_request
+def start_data_watcher():
+    data_store.ensure_watcher()
+
+
+result_cache = None
+if RESULT_CACHE_SIZE > 0:
+    shared_cache = None
+    if RESULT_CACHE_DB:
+        # The shared file serves every worker, so it keeps more entries
+        shared_cache = SQLiteCacheBackend(RESULT_CACHE_DB, RESULT_CACHE_TTL, RESULT_CACHE_SIZE * 10)
+    result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL, shared_cache)
+
+norms_store = NormsStore(NORMS_DB, NORMS_MIN_COUNT, NORMS_FLUSH_INTERVAL)
+atexit.register(norms_store.close)
+
+submission_log = None
+if SUBMISSION_STORE:
+    submission_log = SubmissionLog(open_submission_sink(SUBMISSION_STORE), SUBMISSION_QUEUE_SIZE,
+                                   SUBMISSION_BATCH_SIZE, SUBMISSION_FLUSH_INTERVAL)
+    atexit.register(submission_log.close)
+
+
+def is_warmup():
+    # Warmup traffic (see warmup()) is not a real respondent: it must not
+    # reach the norms, the result cache or the submission log
+    return bool(request.environ.get('lrs.warmup'))
+
 
-# Load data at startup
-qa_df = load_data_file(QUESTIONS_FILE)
-weights_df = load_data_file(WEIGHT_MAP_FILE)
-schemas_df = load_data_file(SCHEMA_INFO_FILE)
+def record_submission(version, source, answers, result):
+    if submission_log is not None and not is_warmup():
+        submission_log.submit(version, source, answers, result)
 
 # -----------------------------
-# FULL SCHEMA DATA (hardcoded fallback with complete 4-week plans)
+# INSTRUMENTATION (exposed on /metrics)
 # -----------------------------
-fallback_schemas = [
-    {
-        "name": "Abandonment / Instability",
-        "category": "Disconnection & Rejection",
-        "causes": "Unstable or unreliable caregiving; fear that close others will leave.",
-        "symptoms": "Intense fear of loss, clinginess or avoidance in relationships, jealousy, emotional volatility.",
-        "manifestations": "Connection (attachment worry), Roots (parent absence/loss), Stability (world anxiety)",
-        "plan": {
-            "week1": "Trigger Mapping: Record every time you feel 'abandonment panic'. Note the objective trigger vs. the internal fear.",
-            "week2": "The Healthy Adult Voice: Practice the thought: 'I am an adult now. Even if this person leaves, I can care for myself.'",
-            "week3": "Planned Separation: Spend an evening alone without checking social media. Practice self-soothing in the silence.",
-            "week4": "Relapse Prevention: Identify 3 healthy ways to ask for reassurance without testing or accusing your partner."
-        }
-    },
-    {
-        "name": "Mistrust / Abuse",
-        "category": "Disconnection & Rejection",
-        "causes": "Abuse, betrayal, or manipulation by caregivers/others.",
-        "symptoms": "Expectation of harm/deception, hypervigilance, difficulty trusting, may test or provoke others.",
-        "manifestations": "Roots (abuse/trauma items), Connection (trust difficulty), Environment (safety concerns)",
-        "plan": {
-            "week1": "Evidence Checking: Pick one person you distrust. List evidence 'for' and 'against' the belief they intend harm.",
-            "week2": "Boundary Training: Practice saying 'I’m not comfortable with that' to minor requests to build internal safety.",
-            "week3": "Vulnerability Experiment: Share one minor personal opinion with a safe person. Observe the safety.",
-            "week4": "Trust Pacing: Categorize people into 'Trust Levels' (1-5). Share only level-appropriate info."
-        }
-    },
-    {
-        "name": "Emotional Deprivation",
-        "category": "Disconnection & Rejection",
-        "causes": "Lack of nurturance, empathy, or affection from caregivers.",
-        "symptoms": "Belief no one will meet emotional needs, loneliness, difficulty asking for support, choosing depriving partners.",
-        "manifestations": "Connection (closeness/intimacy), Roots (neglect/affection lack), Vitality (mood)",
-        "plan": {
-            "week1": "Need Awareness: Every time you feel empty, write down what you needed: Empathy, Protection, or Nurturance.",
-            "week2": "Cognitive Flashcard: Create a card: 'My feeling that no one cares is a schema memory, not a current fact.'",
-            "week3": "Active Request: Ask a trusted person for 10 minutes of active listening regarding a small stressor.",
-            "week4": "Inner Nurturing: Schedule one activity weekly that feels 'nurturing' to your inner child."
-        }
-    },
-    {
-        "name": "Defectiveness / Shame",
-        "category": "Disconnection & Rejection",
-        "causes": "Criticism, rejection, or shaming; feeling inherently flawed.",
-        "symptoms": "Deep shame, self-loathing, hypersensitivity to criticism, hiding 'defects', self-sabotage in relationships.",
-        "manifestations": "Digital Wellbeing (comparison), Meaning (self-worth), Roots (insults/shame)",
-        "plan": {
-            "week1": "Critic Audit: Name your inner critic (e.g., 'The Judge'). Note how often it speaks and the words it uses.",
-            "week2": "Humanity Re-framing: When you make a mistake, say: 'This is a common human experience, not a defect.'",
-            "week3": "Mirror Work: Spend 2 minutes daily looking at yourself saying: 'I am worthy of kindness regardless of flaws.'",
-            "week4": "Compassionate Letter: Write a letter to yourself from the perspective of a wise friend regarding a past mistake."
-        }
-    },
-    {
-        "name": "Social Isolation / Alienation",
-        "category": "Disconnection & Rejection",
-        "causes": "Feeling different or excluded from family/peers.",
-        "symptoms": "Sense of being outsider, avoidance of groups despite longing, feeling no one understands.",
-        "manifestations": "Connection (outsider feelings), Environment (spaces/personal identity), Digital Wellbeing (comparison)",
-        "plan": {
-            "week1": "Similarity Search: In every social setting, find 3 things you have in common with others.",
-            "week2": "Small Talk Script: Prepare 3 open-ended questions to use in conversations.",
-            "week3": "Group Activity: Attend one low-pressure social event (e.g., class, meetup).",
-            "week4": "Reflection: Write what went better than expected and plan next social step."
-        }
-    },
-    {
-        "name": "Dependence / Incompetence",
-        "category": "Impaired Autonomy & Performance",
-        "causes": "Overprotection or discouragement of independence.",
-        "symptoms": "Belief one is incapable, excessive reliance on others, avoidance of responsibility, helplessness.",
-        "manifestations": "Growth (coping/capability), Vitality (focus/energy), Roots (parentification)",
-        "plan": {
-            "week1": "Competence Log: Track 5 daily tasks you completed independently.",
-            "week2": "Decision Practice: Make 3 small decisions without asking for advice.",
-            "week3": "Skill Building: Choose one simple task you've avoided and complete it step-by-step.",
-            "week4": "Reflection: List evidence of your growing capability."
-        }
-    },
-    {
-        "name": "Vulnerability to Harm or Illness",
-        "category": "Impaired Autonomy & Performance",
-        "causes": "Exaggerated danger or traumatic events.",
-        "symptoms": "Catastrophizing, excessive precaution, phobias, hypochondria.",
-        "manifestations": "Vitality (health/resilience), Environment (safety/noise/light), Stability (world anxiety)",
-        "plan": {
-            "week1": "Worry Time: Schedule 15 minutes daily to write all worries, then stop.",
-            "week2": "Probability Estimation: Rate likelihood of feared event (0-100%) and check evidence.",
-            "week3": "Exposure Step: Face one small feared situation (e.g., short trip).",
-            "week4": "Safety Review: List all times feared event did NOT happen."
-        }
-    },
-    {
-        "name": "Enmeshment / Undeveloped Self",
-        "category": "Impaired Autonomy & Performance",
-        "causes": "Over-involved caregivers; no separate identity encouraged.",
-        "symptoms": "Lack of individual direction, guilt when separate, fusion with others' emotions/needs.",
-        "manifestations": "Connection (preoccupation), Meaning (choices/values), Roots (household mental illness)",
-        "plan": {
-            "week1": "Identity List: Write 10 things you like that are independent of others.",
-            "week2": "Boundary Practice: Say 'I need time to think' to one request.",
-            "week3": "Solo Activity: Spend 2 hours on a personal interest without sharing.",
-            "week4": "Reflection: Notice how separate choices feel empowering."
-        }
-    },
-    {
-        "name": "Failure",
-        "category": "Impaired Autonomy & Performance",
-        "causes": "Criticism or comparison leading to belief in inevitable failure.",
-        "symptoms": "Avoidance of challenges, self-sabotage, underachievement despite ability.",
-        "manifestations": "Growth (achievement/perfection), Stability (financial plan), Vitality (energy)",
-        "plan": {
-            "week1": "Success Inventory: List 10 past achievements, big or small.",
-            "week2": "Growth Mindset: Replace 'I failed' with 'I learned'.",
-            "week3": "Small Challenge: Complete one avoided task with realistic goal.",
-            "week4": "Celebrate Effort: Reward process, not just outcome."
-        }
-    },
-    {
-        "name": "Entitlement / Grandiosity",
-        "category": "Impaired Limits",
-        "causes": "Overindulgence or lack of limits.",
-        "symptoms": "Belief one is superior, demands special treatment, lack of empathy/reciprocal responsibility.",
-        "manifestations": "Growth (deservingness/empathy), Digital Wellbeing (rules/control)",
-        "plan": {
-            "week1": "Empathy Log: Note one need of another person daily.",
-            "week2": "Equality Reminder: 'Everyone's needs matter equally'.",
-            "week3": "Delay Gratification: Wait 24h for one non-essential want.",
-            "week4": "Gratitude Practice: Thank someone for meeting a reasonable need."
-        }
-    },
-    {
-        "name": "Insufficient Self-Control / Self-Discipline",
-        "category": "Impaired Limits",
-        "causes": "Lack of structure or consequences.",
-        "symptoms": "Difficulty tolerating frustration, impulsivity, avoidance of discomfort needed for goals.",
-        "manifestations": "Digital Wellbeing (scrolling/notifications), Stability (savings), Growth (procrastination)",
-        "plan": {
-            "week1": "Impulse Log: Track urges and delay action by 10 minutes.",
-            "week2": "If-Then Planning: 'If I feel urge to scroll, then I stand up and stretch'.",
-            "week3": "Commitment Device: Use app blocker for one habit.",
-            "week4": "Reward System: Plan healthy reward after completing task."
-        }
-    },
-    {
-        "name": "Subjugation",
-        "category": "Other-Directedness",
-        "causes": "Punishment for asserting needs; dominance in family.",
-        "symptoms": "Suppression of anger/needs to avoid retaliation, passive compliance, bottled resentment.",
-        "manifestations": "Connection (suppression/peace), Growth (conflict avoidance)",
-        "plan": {
-            "week1": "Need Awareness: Write down 3 suppressed wants daily.",
-            "week2": "Low-Risk Assertion: Express one small preference ('I’d prefer X').",
-            "week3": "Anger Journal: Safely write unsent letter expressing resentment.",
-            "week4": "Boundary Setting: Practice 'No' to one reasonable request."
-        }
-    },
-    {
-        "name": "Self-Sacrifice",
-        "category": "Other-Directedness",
-        "causes": "Guilt or modeling of excessive giving.",
-        "symptoms": "Over-focus on others' needs, neglect own, resentment, burnout.",
-        "manifestations": "Meaning (helping/meaning), Connection (preoccupation), Roots (parentification)",
-        "plan": {
-            "week1": "Giving Audit: Track time/energy given vs. received.",
-            "week2": "Self-Care Priority: Schedule one non-negotiable self-need daily.",
-            "week3": "Balanced Helping: Offer help only when you genuinely want to.",
-            "week4": "Guilt Reframe: 'Meeting my needs allows me to help others sustainably.'"
-        }
-    },
-    {
-        "name": "Approval-Seeking / Recognition-Seeking",
-        "category": "Other-Directedness",
-        "causes": "Love conditional on performance/appearance.",
-        "symptoms": "Excessive need for admiration, identity based on external validation, conformity.",
-        "manifestations": "Digital Wellbeing (validation/likes), Meaning (respect), Growth (worth)",
-        "plan": {
-            "week1": "Validation Source: List 5 internal qualities you value in yourself.",
-            "week2": "Social Media Fast: 1 day without seeking likes/comments.",
-            "week3": "Intrinsic Goal: Do one activity for personal enjoyment, not sharing.",
-            "week4": "Self-Approval Practice: Daily affirm 'My worth is inherent'."
-        }
-    },
-    {
-        "name": "Negativity / Pessimism",
-        "category": "Overvigilance & Inhibition",
-        "causes": "Focus on negative in family; repeated hardship.",
-        "symptoms": "Chronic focus on negatives, worry, discounting positives, life feels bleak.",
-        "manifestations": "Vitality (mood/energy), Stability (world anxiety), Meaning (gratitude/peace)",
-        "plan": {
-            "week1": "3 Good Things: Write 3 positive events daily and why they happened.",
-            "week2": "Evidence Testing: For one worry, list evidence for/against.",
-            "week3": "Gratitude Visit: Write and deliver (or read) a gratitude letter.",
-            "week4": "Best Possible Self: Visualize and write about your ideal future."
-        }
-    },
-    {
-        "name": "Emotional Inhibition",
-        "category": "Overvigilance & Inhibition",
-        "causes": "Suppression of emotions shamed or punished.",
-        "symptoms": "Restraint of feelings, fear of losing control, appear rigid/cold, difficulty with spontaneity.",
-        "manifestations": "Connection (hiding feelings), Digital Wellbeing (curating self), Vitality (mood)",
-        "plan": {
-            "week1": "Emotion Labeling: Name feelings 5 times daily.",
-            "week2": "Safe Expression: Share one feeling with a trusted person.",
-            "week3": "Body Awareness: Notice where emotions live in your body.",
-            "week4": "Play Experiment: Do one spontaneous, fun activity."
-        }
-    },
-    {
-        "name": "Unrelenting Standards / Hypercriticalness",
-        "category": "Overvigilance & Inhibition",
-        "causes": "High pressure for performance; criticism for imperfection.",
-        "symptoms": "Perfectionism, chronic dissatisfaction, burnout, harsh self/other judgment.",
-        "manifestations": "Growth (perfection/strive), Meaning (peace), Connection (suppression)",
-        "plan": {
-            "week1": "Standards Audit: List your 'shoulds' and question necessity.",
-            "week2": "Good Enough Goal: Complete one task to 80% standard deliberately.",
-            "week3": "Self-Compassion Break: Use Kristin's phrase during criticism.",
-            "week4": "Balance Review: Schedule equal time for achievement and rest."
-        }
-    },
-    {
-        "name": "Punitiveness",
-        "category": "Overvigilance & Inhibition",
-        "causes": "Harsh punishment; intolerance of mistakes.",
-        "symptoms": "Self-punishing or punitive toward others, difficulty forgiving errors.",
-        "manifestations": "Vitality (guilt/appetite), Growth (critical mistakes), Roots (cruel discipline)",
-        "plan": {
-            "week1": "Mistake Log: Write mistakes without judgment.",
-            "week2": "Forgiveness Letter: Write (unsent) forgiving yourself or another.",
-            "week3": "Mercy Practice: Respond to one mistake with kindness phrase.",
-            "week4": "Common Humanity: Remind 'Everyone makes mistakes' daily."
-        }
-    }
-]
+http_requests = REGISTRY.counter(
+    'lrs_http_requests_total', 'HTTP requests handled.', ['endpoint', 'method', 'status'])
+http_errors = REGISTRY.counter(
+    'lrs_http_request_errors_total', 'HTTP requests answered with a 5xx status.', ['endpoint'])
+http_duration = REGISTRY.histogram(
+    'lrs_http_request_duration_seconds', 'Time to build the response (excludes streamed bodies).',
+    ['endpoint'])
+http_request_size = REGISTRY.histogram(
+    'lrs_http_request_size_bytes', 'Request body size.', ['endpoint'], SIZE_BUCKETS)
+http_response_size = REGISTRY.histogram(
+    'lrs_http_response_size_bytes', 'Response body size (excludes streamed bodies).',
+    ['endpoint'], SIZE_BUCKETS)
+scoring_stage_duration = REGISTRY.histogram(
+    'lrs_scoring_stage_duration_seconds', 'Time spent per /api/calculate stage.', ['stage'])
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    if PROFILING_ENABLED and request.headers.get(PROFILE_HEADER):
+        g.profiler = SamplingProfiler(threading.get_ident(), PROFILE_INTERVAL).start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    start = g.pop('request_start', None)
+    if start is not None:
+        http_duration.observe(time.perf_counter() - start, endpoint=endpoint)
+    http_requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    if response.status_code >= 500:
+        http_errors.inc(endpoint=endpoint)
+    if request.content_length:
+        http_request_size.observe(request.content_length, endpoint=endpoint)
+    if not response.is_streamed:
+        http_response_size.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        try:
+            profile_id, _ = profiler.write(PROFILE_DIR)
+            response.headers['X-LRS-Profile-Id'] = profile_id
+        except OSError as e:
+            print(f"Could not write profile: {e}")
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 # -----------------------------
 # API ENDPOINTS
 # -----------------------------
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "LRS Scoring Engine Online", "version": "1.0.0"}), 200
+    snapshot = data_store.current
+    return jsonify({
+        "status": "LRS Scoring Engine Online",
+        "version": "1.0.0",
+        "data_version": snapshot.version,
+        "data_loaded_at": snapshot.loaded_at
+    }), 200
 
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
-    if qa_df is None:
+    questions_payload = data_store.current.questions_payload
+    if questions_payload is None:
         return jsonify({"error": "Questions file not loaded"}), 500
-    
-    # Replace NaN with empty string to prevent invalid JSON
-    clean_df = qa_df.fillna('')
-    questions = clean_df.to_dict(orient='records')
-    return jsonify(questions)
+    return questions_payload.respond()
 
 @app.route('/api/calculate', methods=['POST'])
 def calculate_results():
@@ -307,93 +201,230 @@ def calculate_results():
     if not user_answers:
         return jsonify({"error": "No answers provided"}), 400
 
-    if weights_df is None:
+    snapshot = data_store.current
+    scoring_model = snapshot.scoring_model
+    if scoring_model is None:
         return jsonify({"error": "Server data files missing"}), 500
 
-    scores = {}
-
-    for _, row in weights_df.iterrows():
-        q_id = str(row.get('Question ID', row.get('ID', ''))).strip()
-        schema_name = str(row.get('Schema Name', '')).strip()
-        weight = float(row.get('Weight', 1.0))
-        direction = str(row.get('SCORING LOGIC', '')).strip().lower()
-
-        if q_id in user_answers:
-            answer_value = user_answers[q_id]
-            if isinstance(answer_value, str):
-                # AI synthesis for open-ended
-                # Simple keyword-based "AI" for demo - in real, use xAI API or Grok
-                # For each schema, check if text mentions keywords
-                keywords = {
-                    "Abandonment / Instability": ["abandon", "leave", "unstable", "loss"],
-                    "Mistrust / Abuse": ["abuse", "betray", "deceive", "hurt", "mistrust"],
-                    "Emotional Deprivation": ["deprived", "lonely", "unloved", "neglect"],
-                    "Defectiveness / Shame": ["defect", "shame", "flawed", "unworthy"],
-                    "Social Isolation / Alienation": ["isolate", "alien", "outsider", "excluded"],
-                    "Dependence / Incompetence": ["depend", "incompetent", "helpless"],
-                    "Vulnerability to Harm or Illness": ["vulnerable", "harm", "illness", "danger"],
-                    "Enmeshment / Undeveloped Self": ["enmesh", "undeveloped", "fusion"],
-                    "Failure": ["fail", "underachieve", "inadequate"],
-                    "Entitlement / Grandiosity": ["entitle", "grand", "superior", "special"],
-                    "Insufficient Self-Control / Self-Discipline": ["impulse", "lack control", "discipline"],
-                    "Subjugation": ["subjugate", "suppress", "give in"],
-                    "Self-Sacrifice": ["sacrifice", "overgive", "neglect self"],
-                    "Approval-Seeking / Recognition-Seeking": ["approve", "seek recognition", "validation"],
-                    "Negativity / Pessimism": ["negative", "pessim", "bleak"],
-                    "Emotional Inhibition": ["inhibit emotion", "suppress feeling", "rigid"],
-                    "Unrelenting Standards / Hypercriticalness": ["unrelent standard", "hypercritic", "perfection"],
-                    "Punitiveness": ["punitive", "unforgiving", "self-punish"]
-                }
-                text_lower = answer_value.lower()
-                for s_name, kws in keywords.items():
-                    if any(kw in text_lower for kw in kws):
-                        scores[s_name] = scores.get(s_name, 0) + weight * 4  # High score for match
-            else:
-                # Numeric answer
-                try:
-                    answer = float(answer_value)
-                except ValueError:
-                    continue
-                if 'reverse' in direction:
-                    answer = 5 - answer + 1  # 0-4 scale reverse
-                weighted = answer * weight
-                scores[schema_name] = scores.get(schema_name, 0) + weighted
-
-    results = []
-    for schema in fallback_schemas:
-        name = schema['name']
-        score = scores.get(name, 0.0)
-        results.append({
-            "name": name,
-            "category": schema['category'],
-            "score": round(score, 2),
-            "causes": schema['causes'],
-            "symptoms": schema['symptoms'],
-            "manifestations": schema['manifestations'],
-            "plan": schema['plan']
-        })
-
-    results.sort(key=lambda x: x['score'], reverse=True)
-    # Limit to top 5
-    results = results[:5]
-    return jsonify({"top_schemas": results})
+    timings = {}
+    scores = cache_key = None
+    if result_cache is not None:
+        cache_key = answers_key(scoring_model, user_answers, snapshot.version)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            scores = unpack_scores(cached)
+    fresh = scores is None
+    record = fresh and not is_warmup()
+    if fresh:
+        scores = score_answers(scoring_model, user_answers, timings)
+    # Ranked on every request, so percentiles follow the current norms
+    rank_start = time.perf_counter()
+    norm_set = norms_store.get(snapshot.version)
+    results = build_results(scores, norm_set)
+    serialize_start = time.perf_counter()
+    response = jsonify({"top_schemas": results})
+    timings['rank'] = serialize_start - rank_start
+    timings['serialize'] = time.perf_counter() - serialize_start
+    for stage, seconds in timings.items():
+        scoring_stage_duration.observe(seconds, stage=stage)
+    if record and cache_key is not None:
+        result_cache.put(cache_key, pack_scores(scores))
+    record_submission(snapshot.version, 'calculate', user_answers, response.get_data())
+    if record:
+        # Fed after the lookup, so a respondent is not compared against
+        # themselves; resubmitting a cached answer set is not counted again
+        norms_store.observe(norm_set, [scores])
+    return response
+
+# Respondents scored per matrix product when streaming a batch
+BATCH_CHUNK_SIZE = 1000
+
+
+def _iter_ndjson_items():
+    # NDJSON bodies are read line by line as the stream is consumed
+    for line in io.BufferedReader(request.stream, 1 << 16):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _score_chunk(snapshot, norm_set, chunk):
+    if not chunk:
+        return
+    answer_sets = [item['answers'] for _, item in chunk]
+    scores = score_answer_matrix(snapshot.scoring_model, answer_sets)
+    for (index, item), row in zip(chunk, scores):
+        line = {"index": index, "top_schemas": build_results(row, norm_set)}
+        if 'id' in item:
+            line['id'] = item['id']
+        line = app.json.dumps(line)
+        record_submission(snapshot.version, 'batch', item['answers'], line)
+        yield line + "\n"
+    norms_store.observe(norm_set, scores)
+
+
+@app.route('/api/calculate/batch', methods=['POST'])
+def calculate_batch():
+    # NDJSON is streamed; a plain JSON body ({"respondents": [...]}) is
+    # checked here, before the 200 headers go out
+    if request.mimetype == 'application/x-ndjson':
+        items = _iter_ndjson_items()
+    else:
+        data = request.get_json(silent=True)
+        items = data.get('respondents') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON object with a 'respondents' list"}), 400
+
+    # One model for the whole stream, even if the data reloads midway
+    snapshot = data_store.current
+    scoring_model = snapshot.scoring_model
+    if scoring_model is None:
+        return jsonify({"error": "Server data files missing"}), 500
+    norm_set = norms_store.get(snapshot.version)
+
+    def generate():
+        chunk = []
+        for index, item in enumerate(items):
+            answers = item.get('answers') if isinstance(item, dict) else None
+            if not answers or not isinstance(answers, dict):
+                yield from _score_chunk(snapshot, norm_set, chunk)
+                chunk = []
+                yield app.json.dumps({"index": index, "error": "No answers provided"}) + "\n"
+                continue
+            chunk.append((index, item))
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                yield from _score_chunk(snapshot, norm_set, chunk)
+                chunk = []
+        yield from _score_chunk(snapshot, norm_set, chunk)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/norms', methods=['GET'])
+def get_norms():
+    snapshot = data_store.current
+    return jsonify({
+        "data_version": snapshot.version,
+        "min_count": NORMS_MIN_COUNT,
+        "schemas": norms_store.get(snapshot.version).summary()
+    })
+
+# Incremental scoring: create a session, post answers as they come in and
+# read provisional results at any point
+if SESSION_DB:
+    session_store = SQLiteSessionStore(SESSION_DB, SESSION_TTL)
+else:
+    session_store = MemorySessionStore(SESSION_TTL)
+
+
+def _session_response(session, snapshot):
+    if session is None:
+        return jsonify({"error": "Session not found"}), 404
+    if session.version != snapshot.version:
+        return jsonify({"error": "Scoring data changed, please start a new session"}), 409
+    norm_set = norms_store.get(snapshot.version)
+    return jsonify({"answered": session.answered, "top_schemas": build_results(session.totals, norm_set)})
+
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    snapshot = data_store.current
+    if snapshot.scoring_model is None:
+        return jsonify({"error": "Server data files missing"}), 500
+    session_id = session_store.create(snapshot.version)
+    return jsonify({"session_id": session_id, "data_version": snapshot.version,
+                    "expires_in": SESSION_TTL}), 201
+
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    return _session_response(session_store.update(session_id), data_store.current)
+
+
+@app.route('/api/sessions/<session_id>/answers', methods=['POST'])
+def post_session_answers(session_id):
+    data = request.get_json(silent=True) or {}
+    answers = data.get('answers')
+    if not answers or not isinstance(answers, dict):
+        return jsonify({"error": "No answers provided"}), 400
+
+    snapshot = data_store.current
+
+    def apply(session):
+        # Sessions keep scoring against the data version they started with
+        if session.version == snapshot.version:
+            session.apply(snapshot.scoring_model, answers)
+
+    return _session_response(session_store.update(session_id, apply), snapshot)
+
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    if not session_store.delete(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    return '', 204
 
 # -----------------------------
 # SERVE REACT FRONTEND
 # -----------------------------
+def _compressible(mimetype):
+    return mimetype.startswith('text/') or mimetype in (
+        'application/javascript', 'application/json', 'image/svg+xml')
+
+
+def index_static_assets(folder):
+    # Read the whole build into memory once: path -> PreparedResponse
+    assets = {}
+    if not os.path.isdir(folder):
+        print(f"Frontend build not found: {folder}")
+        return assets
+    for root, _, files in os.walk(folder):
+        for name in files:
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, folder).replace(os.sep, '/')
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            if path.startswith('static/') and HASHED_ASSET_NAME.search(name):
+                cache_control = STATIC_IMMUTABLE_CACHE_CONTROL
+            else:
+                cache_control = STATIC_CACHE_CONTROL
+            with open(full_path, 'rb') as f:
+                body = f.read()
+            assets[path] = PreparedResponse(body, mimetype, cache_control, _compressible(mimetype))
+    return assets
+
+
+static_assets = index_static_assets(os.path.join(os.getcwd(), FRONTEND_BUILD_FOLDER))
+
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_react(path):
-    build_path = os.path.join(os.getcwd(), FRONTEND_BUILD_FOLDER)
-    full_path = os.path.join(build_path, path)
-    if path != "" and os.path.exists(full_path):
-        return send_from_directory(build_path, path)
-    else:
-        return send_from_directory(build_path, 'index.html')
+    # Unknown paths fall through to index.html for client-side routing
+    asset = static_assets.get(path) or static_assets.get('index.html')
+    if asset is None:
+        abort(404)
+    return asset.respond()
 
 # -----------------------------
 # Run Server
 # -----------------------------
+def warmup():
+    # Exercise the request path once so lazy initialization (routing, JSON
+    # provider, numpy kernels) happens before the worker takes traffic
+    client = app.test_client()
+    client.get('/api/health')
+    client.get('/api/questions', headers={'Accept-Encoding': 'gzip'})
+    scoring_model = data_store.current.scoring_model
+    if scoring_model is not None:
+        answers = {q_id: 2 for q_id in scoring_model.question_index}
+        answers[next(iter(answers))] = "warmup answer"
+        client.post('/api/calculate', json={"answers": answers}, environ_base={'lrs.warmup': True})
+
+
+# Development server only; production runs gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+
+# -----------------------------
+# Compare two benchmark result files and flag regressions
+#
+#   python -m bench.compare baseline.json candidate.json [--threshold 10]
+#
+# Exits with status 1 when any metric got worse by more than the threshold.
+# -----------------------------
+
+
+def compare(baseline, candidate, threshold):
+    rows = []
+    regressions = 0
+    for name, base in baseline['metrics'].items():
+        new = candidate['metrics'].get(name)
+        if new is None:
+            continue
+        if base['value']:
+            change = (new['value'] - base['value']) / abs(base['value']) * 100.0
+        else:
+            change = 0.0 if not new['value'] else float('inf')
+        worse = change if base.get('better', 'lower') == 'lower' else -change
+        regressed = worse > threshold
+        regressions += regressed
+        rows.append((name, base['value'], new['value'], change, regressed))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    if baseline.get('suite') != candidate.get('suite'):
+        print(f"Warning: comparing suite {baseline.get('suite')} with {candidate.get('suite')}")
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    for name, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<{width}}  {old:>14,.3f} -> {new:>14,.3f}  {change:+7.1f}%{flag}")
+    if regressions:
+        print(f"{regressions} metric(s) regressed by more than {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
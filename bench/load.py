@@ -0,0 +1,158 @@
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from bench.respondents import generate_respondents
+from bench.results import metric, print_metrics, save_results
+
+# -----------------------------
+# Concurrent load driver
+#
+#   python -m bench.load --scenario calculate --concurrency 8 --requests 2000
+#   python -m bench.load --url http://localhost:5000   # against a running server
+#
+# Without --url the Flask app is started in-process on an ephemeral port,
+# with the result cache off unless --cache is given. Every calculate request
+# carries a distinct respondent, so the numbers measure scoring.
+# -----------------------------
+SCENARIOS = ('calculate', 'questions', 'mixed')
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an ascending list
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def start_local_server(cache=False):
+    if not cache:
+        os.environ['RESULT_CACHE_SIZE'] = '0'  # read when app is imported
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def build_requests(scenario, count, text_words):
+    # Pre-encode every request body so the driver measures the server, not
+    # itself; each calculate request gets its own respondent
+    is_calculate = [scenario == 'calculate' or (scenario == 'mixed' and not i % 2) for i in range(count)]
+    bodies = iter([json.dumps({"answers": a}).encode()
+                   for a in generate_respondents(sum(is_calculate), text_words=text_words)])
+    return [('POST', '/api/calculate', next(bodies)) if calculate else ('GET', '/api/questions', None)
+            for calculate in is_calculate]
+
+
+class Worker:
+    def __init__(self, url):
+        self.parts = urlsplit(url)
+        self.conn = None
+
+    def send(self, method, path, body):
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.parts.hostname, self.parts.port, timeout=30)
+            try:
+                headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'} if body else {'Accept-Encoding': 'gzip'}
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                payload = response.read()
+                return response.status, len(payload)
+            except (ConnectionError, http.client.HTTPException):
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+
+
+def run_load(url, requests, concurrency):
+    local = threading.local()
+    latencies = []
+    errors = 0
+    response_bytes = 0
+    lock = threading.Lock()
+
+    def one(req):
+        nonlocal errors, response_bytes
+        worker = getattr(local, 'worker', None)
+        if worker is None:
+            worker = local.worker = Worker(url)
+        start = time.perf_counter()
+        try:
+            status, size = worker.send(*req)
+        except Exception:
+            status, size = 0, 0
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            response_bytes += size
+            if status >= 400 or status == 0:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, requests))
+    wall = time.perf_counter() - start
+    return sorted(latencies), wall, errors, response_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the LRS API.")
+    parser.add_argument('--url', help="base URL of a running server (default: start the app in-process)")
+    parser.add_argument('--scenario', choices=SCENARIOS, default='calculate')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--text-words', type=int, default=60, help="words per open-ended answer")
+    parser.add_argument('--cache', action='store_true',
+                        help="keep the result cache on in the in-process server")
+    parser.add_argument('--output', help="results file (default: bench/results/load-<time>.json)")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_local_server(args.cache)
+    try:
+        # Warmup bodies are not replayed in the measured run
+        requests = build_requests(args.scenario, args.warmup + args.requests, args.text_words)
+        run_load(url, requests[:args.warmup], args.concurrency)
+        requests = requests[args.warmup:]
+        latencies, wall, errors, response_bytes = run_load(url, requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    metrics = {
+        "throughput_rps": metric(len(latencies) / wall, "req/s", 'higher'),
+        "latency_p50_ms": metric(percentile(latencies, 50) * 1e3, "ms"),
+        "latency_p95_ms": metric(percentile(latencies, 95) * 1e3, "ms"),
+        "latency_p99_ms": metric(percentile(latencies, 99) * 1e3, "ms"),
+        "latency_max_ms": metric(latencies[-1] * 1e3 if latencies else 0.0, "ms"),
+        "error_rate": metric(errors / max(len(latencies), 1), "ratio"),
+        "mean_response_bytes": metric(response_bytes / max(len(latencies), 1), "bytes"),
+    }
+    config = {"url": args.url or "in-process", "scenario": args.scenario, "requests": args.requests,
+              "concurrency": args.concurrency, "text_words": args.text_words,
+              "result_cache": args.cache if args.url is None else "server"}
+    print_metrics(metrics)
+    print(f"Saved {save_results(f'load-{args.scenario}', metrics, config, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
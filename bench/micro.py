@@ -0,0 +1,74 @@
+import argparse
+import random
+import timeit
+
+import numpy as np
+
+from bench.respondents import free_text, generate_respondents, load_question_set
+from bench.results import metric, print_metrics, save_results
+from scoring import (
+    KEYWORDS_FILE, WEIGHT_MAP_FILE, KeywordMatcher, build_results, compile_scoring_model,
+    load_data_file, load_keyword_table, score_answer_matrix, score_answers,
+)
+
+# -----------------------------
+# Micro-benchmarks of the scoring core
+#
+#   python -m bench.micro [--batch 2000] [--text-words 60]
+# -----------------------------
+
+
+def best_time(fn, repeat=5):
+    # Seconds per call, best of `repeat` runs of an auto-sized loop
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark the LRS scoring core.")
+    parser.add_argument('--batch', type=int, default=2000, help="respondents per batch benchmark")
+    parser.add_argument('--text-words', type=int, default=60, help="words per open-ended answer")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="results file (default: bench/results/micro-<time>.json)")
+    args = parser.parse_args(argv)
+
+    weights_df = load_data_file(WEIGHT_MAP_FILE)
+    keyword_table = load_keyword_table(load_data_file(KEYWORDS_FILE))
+    model = compile_scoring_model(weights_df, keyword_table)
+    questions = load_question_set()
+    respondents = list(generate_respondents(args.batch, questions, text_words=args.text_words))
+    one = respondents[0]
+    scores = score_answers(model, one)
+    rng = random.Random(1)
+    short_text, long_text = free_text(rng, 100), free_text(rng, 1000)
+    numeric_only = [{q: a for q, a in r.items() if not isinstance(a, str)} for r in respondents]
+
+    per_call = {
+        "compile_model": lambda: compile_scoring_model(weights_df, keyword_table),
+        "compile_keyword_matcher": lambda: KeywordMatcher(keyword_table),
+        "score_single": lambda: score_answers(model, one),
+        "build_results": lambda: build_results(scores),
+        "match_text_100_words": lambda: model.matcher.match(short_text),
+        "match_text_1000_words": lambda: model.matcher.match(long_text),
+    }
+    metrics = {}
+    for name, fn in per_call.items():
+        metrics[f"{name}_us"] = metric(best_time(fn, args.repeat) * 1e6, "us/op")
+
+    batch_time = best_time(lambda: score_answer_matrix(model, respondents), args.repeat)
+    metrics["score_batch_rows_per_s"] = metric(len(respondents) / batch_time, "rows/s", 'higher')
+    numeric_time = best_time(lambda: score_answer_matrix(model, numeric_only), args.repeat)
+    metrics["score_batch_numeric_rows_per_s"] = metric(len(respondents) / numeric_time, "rows/s", 'higher')
+    end_to_end = best_time(lambda: [build_results(row) for row in score_answer_matrix(model, respondents)],
+                           args.repeat)
+    metrics["score_and_rank_rows_per_s"] = metric(len(respondents) / end_to_end, "rows/s", 'higher')
+
+    config = {"batch": args.batch, "text_words": args.text_words, "repeat": args.repeat,
+              "numpy": np.__version__}
+    print_metrics(metrics)
+    print(f"Saved {save_results('micro', metrics, config, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
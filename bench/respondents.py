@@ -0,0 +1,59 @@
+import random
+import re
+
+from scoring import QUESTIONS_FILE, fallback_keywords, load_data_file
+
+# -----------------------------
+# Synthetic respondents built from the real question set
+# -----------------------------
+SCALE_RANGE = re.compile(r'(\d+)\s*=.*?→\s*(\d+)')
+
+FILLER_WORDS = (
+    "my mother father family friends partner work school home money time "
+    "often sometimes usually never always felt feel was were we they and but "
+    "because when then really quite very little more less busy warm kind "
+    "calm strict distant close together apart talk argue laugh help"
+).split()
+
+
+def load_question_set(path=QUESTIONS_FILE):
+    # [(question ID, (low, high)) or (question ID, None) for open-ended items]
+    df = load_data_file(path)
+    if df is None:
+        raise SystemExit(f"Questions file not loaded: {path}")
+    questions = []
+    for q_id, scale_type, options in zip(df['ID'], df['Scale Type'], df['Scale Options']):
+        scale_type = str(scale_type).strip()
+        if scale_type == 'Open':
+            questions.append((str(q_id), None))
+            continue
+        match = SCALE_RANGE.search(str(options))
+        if match:
+            questions.append((str(q_id), (int(match.group(1)), int(match.group(2)))))
+        else:
+            # Yes/No items carry no options text
+            questions.append((str(q_id), (0, 1)))
+    return questions
+
+
+def free_text(rng, words, keyword_rate=0.05):
+    keywords = [kw for kws in fallback_keywords.values() for kw in kws]
+    return " ".join(rng.choice(keywords) if rng.random() < keyword_rate else rng.choice(FILLER_WORDS)
+                    for _ in range(words))
+
+
+def generate_respondents(n, questions=None, text_words=60, keyword_rate=0.05,
+                         skip_rate=0.0, seed=0):
+    # Yields answer dicts shaped like the client's POST /api/calculate payload
+    questions = questions or load_question_set()
+    rng = random.Random(seed)
+    for _ in range(n):
+        answers = {}
+        for q_id, scale in questions:
+            if skip_rate and rng.random() < skip_rate:
+                continue
+            if scale is None:
+                answers[q_id] = free_text(rng, text_words, keyword_rate)
+            else:
+                answers[q_id] = rng.randint(*scale)
+        yield answers
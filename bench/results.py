@@ -0,0 +1,44 @@
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+# -----------------------------
+# Benchmark result files
+#
+# {"suite": ..., "timestamp": ..., "environment": {...},
+#  "metrics": {name: {"value": float, "unit": str, "better": "lower" | "higher"}}}
+# -----------------------------
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def metric(value, unit, better='lower'):
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def save_results(suite, metrics, config, path=None):
+    timestamp = datetime.now(timezone.utc)
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{suite}-{timestamp:%Y%m%dT%H%M%SZ}.json")
+    payload = {
+        "suite": suite,
+        "timestamp": timestamp.isoformat(timespec='seconds'),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "metrics": metrics,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def print_metrics(metrics):
+    width = max(len(name) for name in metrics)
+    for name, m in metrics.items():
+        print(f"  {name:<{width}}  {m['value']:>14,.3f} {m['unit']}")
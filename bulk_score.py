@@ -0,0 +1,165 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from scoring import KEYWORDS_FILE, WEIGHT_MAP_FILE, build_results, load_scoring_model, score_answer_matrix
+
+# -----------------------------
+# Offline bulk scoring
+#
+#   python bulk_score.py responses.jsonl -o results.jsonl --workers 8
+#
+# JSONL input: one {"id": ..., "answers": {...}} object per line, the same
+# shape as POST /api/calculate/batch. CSV input: one respondent per row,
+# columns named by question ID plus an optional id column. Output is one
+# JSON line per respondent, in input order.
+# -----------------------------
+DEFAULT_CHUNK_SIZE = 2000
+
+# Compiled model, set once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _csv_value(cell):
+    # CSV cells are always text; numeric ones are scored as numbers by the engine
+    cell = cell.strip()
+    return cell or None
+
+
+def iter_csv(stream, id_column):
+    for row in csv.DictReader(stream):
+        item = {"answers": {}}
+        for column, cell in row.items():
+            if column is None or cell is None:
+                continue
+            if column == id_column:
+                item['id'] = cell
+                continue
+            value = _csv_value(cell)
+            if value is not None:
+                item['answers'][column.strip()] = value
+        yield item
+
+
+def iter_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def score_chunk(chunk, brief=False, model=None):
+    # chunk is a list of (index, item); returns the output lines for it
+    model = model or _worker_model
+    valid = []
+    lines = {}
+    for index, item in chunk:
+        answers = item.get('answers') if isinstance(item, dict) else None
+        if not answers or not isinstance(answers, dict):
+            lines[index] = {"index": index, "error": "No answers provided"}
+        else:
+            valid.append((index, item))
+
+    if valid:
+        scores = score_answer_matrix(model, [item['answers'] for _, item in valid])
+        for (index, item), row in zip(valid, scores):
+            top = build_results(row)
+            if brief:
+                top = [{"name": s['name'], "score": s['score']} for s in top]
+            line = {"index": index, "top_schemas": top}
+            if 'id' in item:
+                line['id'] = item['id']
+            lines[index] = line
+
+    return [json.dumps(lines[index], sort_keys=True) + "\n" for index, _ in chunk]
+
+
+def _chunks(items, chunk_size):
+    numbered = enumerate(items)
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(items, out, model, workers, chunk_size, brief=False):
+    # At most two chunks per worker are in flight, so memory stays bounded
+    # however large the input is; results are written in input order.
+    rows = 0
+    if workers <= 1:
+        for chunk in _chunks(items, chunk_size):
+            out.writelines(score_chunk(chunk, brief, model))
+            rows += len(chunk)
+        return rows
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model,)) as pool:
+        pending = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append((len(chunk), pool.submit(score_chunk, chunk, brief)))
+            if len(pending) >= workers * 2:
+                size, future = pending.popleft()
+                out.writelines(future.result())
+                rows += size
+        while pending:
+            size, future = pending.popleft()
+            out.writelines(future.result())
+            rows += size
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL export of LRS responses.")
+    parser.add_argument('input', help="responses file (.csv or .jsonl), '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output JSONL file (default: stdout)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="input format (default: from extension)")
+    parser.add_argument('--id-column', default='id', help="CSV column holding the respondent id")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--brief', action='store_true', help="only write schema names and scores")
+    parser.add_argument('--weights', default=WEIGHT_MAP_FILE)
+    parser.add_argument('--keywords', default=KEYWORDS_FILE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    model = load_scoring_model(args.weights, args.keywords)
+    if model is None:
+        print(f"Could not load weight map: {args.weights}", file=sys.stderr)
+        return 1
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        items = iter_csv(source, args.id_column) if fmt == 'csv' else iter_jsonl(source)
+        start = time.perf_counter()
+        rows = run(items, out, model, args.workers, args.chunk_size, args.brief)
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+from data_snapshot import DataSnapshot, data_version, fingerprint_files
+from prepared_response import PreparedResponse
+from scoring import (
+    KEYWORDS_FILE, QUESTIONS_FILE, SCHEMA_INFO_FILE, WEIGHT_MAP_FILE,
+    compile_scoring_model, load_data_file, load_keyword_table, pack_scoring_model, unpack_scoring_model,
+)
+
+# -----------------------------
+# BINARY DATA CACHE
+#
+# The CSVs compiled into one file the server can load without pandas:
+#
+#   magic (8 bytes) | header length (u32 LE) | JSON header | sections...
+#
+# The header records the data version (hash of the source files), the
+# compiler version (CACHE_FORMAT plus a hash of the modules that decide
+# the cache contents) and the offset/length of each raw section (little-endian arrays,
+# payload bytes). A cache built from other data or other code is ignored
+# and rebuilt.
+#
+#   python data_cache.py     # build step: compile the cache ahead of time
+# -----------------------------
+DATA_CACHE_FILE = os.environ.get('DATA_CACHE_FILE', '.lrs_data_cache.bin')
+DATA_FILES = [QUESTIONS_FILE, WEIGHT_MAP_FILE, SCHEMA_INFO_FILE, KEYWORDS_FILE]
+
+# Cache-Control for API payloads that only change when the data files do
+API_CACHE_CONTROL = "public, max-age=60"
+
+MAGIC = b'LRSDATA1'
+_LENGTH = struct.Struct('<I')
+
+# Bump when the section layout changes
+CACHE_FORMAT = 1
+# Modules whose code decides what the cache holds: the scoring model
+# layout, the questions payload and its compressed variants
+COMPILER_SOURCES = ('scoring.py', 'prepared_response.py', 'data_cache.py')
+
+
+def compiler_version():
+    digest = hashlib.sha256(f"format={CACHE_FORMAT};".encode())
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in COMPILER_SOURCES:
+        try:
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(f"{name}=missing;".encode())
+    return digest.hexdigest()[:12]
+
+
+def write_data_cache(path, version, header, sections):
+    offsets = {}
+    position = 0
+    for name, data in sections.items():
+        offsets[name] = [position, len(data)]
+        position += len(data)
+    header = dict(header, version=version, compiler=compiler_version(), sections=offsets)
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+
+    # Write then rename, so readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(encoded)))
+        f.write(encoded)
+        for data in sections.values():
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_data_cache(path, version):
+    # (header, {section: memoryview}) or None if missing, corrupt or stale
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if raw[:len(MAGIC)] != MAGIC:
+        return None
+    try:
+        (length,) = _LENGTH.unpack_from(raw, len(MAGIC))
+        start = len(MAGIC) + _LENGTH.size
+        header = json.loads(raw[start:start + length])
+    except (struct.error, ValueError):
+        return None
+    if header.get('version') != version or header.get('compiler') != compiler_version():
+        return None
+
+    base = start + length
+    view = memoryview(raw)
+    sections = {}
+    for name, (offset, size) in header['sections'].items():
+        if base + offset + size > len(raw):
+            return None
+        sections[name] = view[base + offset:base + offset + size]
+    return header, sections
+
+
+def prepare_questions(df):
+    if df is None:
+        return None
+    # Replace NaN with empty string to prevent invalid JSON
+    questions = df.fillna('').to_dict(orient='records')
+    # Same bytes jsonify would produce (Flask's default, non-debug settings)
+    body = (json.dumps(questions, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + "\n").encode()
+    return PreparedResponse(body, 'application/json', API_CACHE_CONTROL)
+
+
+def build_snapshot(version):
+    # The snapshot for a data version, read from the cache when it is current
+    cached = read_data_cache(DATA_CACHE_FILE, version)
+    if cached is None:
+        return compile_snapshot(version)
+    header, sections = cached
+    compressed = {name.split('.', 1)[1]: bytes(data) for name, data in sections.items()
+                  if name.startswith('questions.') and name != 'questions.identity'}
+    return DataSnapshot(
+        version,
+        schemas=header['schemas'],
+        questions_payload=PreparedResponse(bytes(sections['questions.identity']), 'application/json',
+                                           API_CACHE_CONTROL, compressed=compressed),
+        scoring_model=unpack_scoring_model(header, sections),
+    )
+
+
+def compile_snapshot(version):
+    # Parse the CSVs (the one place pandas gets imported) and write the cache
+    qa_df = load_data_file(QUESTIONS_FILE)
+    weights_df = load_data_file(WEIGHT_MAP_FILE)
+    schemas_df = load_data_file(SCHEMA_INFO_FILE)
+    keywords_df = load_data_file(KEYWORDS_FILE)
+    snapshot = DataSnapshot(
+        version,
+        schemas=None if schemas_df is None else schemas_df.fillna('').to_dict(orient='records'),
+        questions_payload=prepare_questions(qa_df),
+        scoring_model=compile_scoring_model(weights_df, load_keyword_table(keywords_df)),
+    )
+    if snapshot.missing:
+        return snapshot  # never cache a partial load
+
+    header, sections = pack_scoring_model(snapshot.scoring_model)
+    header['schemas'] = snapshot.schemas
+    for encoding, data in snapshot.questions_payload.variants.items():
+        sections[f'questions.{encoding}'] = data
+    try:
+        write_data_cache(DATA_CACHE_FILE, version, header, sections)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not write data cache {DATA_CACHE_FILE}: {e}")
+    return snapshot
+
+
+def main():
+    # Build the snapshot for the current data files, compiling the cache
+    # from the CSVs when it is missing or stale
+    start = time.perf_counter()
+    snapshot = build_snapshot(data_version(fingerprint_files(DATA_FILES)))
+    if snapshot.missing:
+        print("Data files missing, no cache written", file=sys.stderr)
+        return 1
+    print(f"Data cache {DATA_CACHE_FILE} ready for version {snapshot.version} "
+          f"({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
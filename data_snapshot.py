@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# -----------------------------
+# VERSIONED DATA SNAPSHOTS
+#
+# Everything derived from the data files (questions payload, compiled
+# weights, schema catalog) lives in one DataSnapshot. A snapshot is never
+# mutated: a reload builds a new one off the request path and swaps the
+# store's reference in one assignment, so a request that reads
+# `store.current` once sees a single consistent version throughout.
+# -----------------------------
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_files(paths, previous=None):
+    # path -> (mtime_ns, size, sha256); a file is only re-hashed when its
+    # mtime or size moved since the previous fingerprint
+    previous = previous or {}
+    fingerprint = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            fingerprint[path] = None
+            continue
+        old = previous.get(path)
+        if old is not None and old[:2] == (stat.st_mtime_ns, stat.st_size):
+            fingerprint[path] = old
+        else:
+            fingerprint[path] = (stat.st_mtime_ns, stat.st_size, _file_hash(path))
+    return fingerprint
+
+
+def data_version(fingerprint):
+    # Content-only version id: touching a file without changing it keeps it
+    digest = hashlib.sha256()
+    for path in sorted(fingerprint):
+        entry = fingerprint[path]
+        digest.update(f"{path}={entry[2] if entry else 'missing'};".encode())
+    return digest.hexdigest()[:12]
+
+
+class DataSnapshot:
+    # One immutable version of the loaded data; fields are set once by the builder
+    def __init__(self, version, **fields):
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @property
+    def missing(self):
+        # Fields the builder could not load (a missing or unreadable file)
+        return [name for name, value in vars(self).items() if value is None]
+
+
+class SnapshotStore:
+    def __init__(self, paths, build, interval=5.0):
+        self.paths = list(paths)
+        self.build = build  # build(version) -> DataSnapshot
+        self.interval = interval
+        self._fingerprint = fingerprint_files(self.paths)
+        self._lock = threading.Lock()
+        self._watcher_lock = threading.Lock()
+        self._watcher_pid = None
+        self.current = build(data_version(self._fingerprint))
+
+    def reload(self):
+        # Rebuild and swap in a new snapshot if the file contents changed.
+        # Returns True when a new version was installed.
+        with self._lock:
+            fingerprint = fingerprint_files(self.paths, self._fingerprint)
+            version = data_version(fingerprint)
+            self._fingerprint = fingerprint
+            if version == self.current.version:
+                return False
+            try:
+                snapshot = self.build(version)
+            except Exception as e:
+                print(f"Data reload failed, keeping version {self.current.version}: {e}")
+                return False
+            if snapshot.missing:
+                # Usually a file caught mid-save; the next tick retries, since
+                # the version still differs from the current one
+                print(f"Data reload incomplete ({', '.join(snapshot.missing)} not loaded), "
+                      f"keeping version {self.current.version}")
+                return False
+            self.current = snapshot
+            print(f"Data reloaded: version {version}")
+            return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Data watcher error: {e}")
+
+    def ensure_watcher(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self.interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._watcher_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name='data-watcher', daemon=True).start()
@@ -0,0 +1,47 @@
+import gc
+import multiprocessing
+import os
+
+# -----------------------------
+# Production server (gunicorn -c gunicorn.conf.py wsgi:app)
+#
+# The app, and with it the CSV data and compiled scoring model, is loaded
+# once in the master and shared copy-on-write by the forked workers.
+# -----------------------------
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# WEB_CONCURRENCY is set by Heroku from the dyno size
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+worker_class = 'gthread'
+
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers now and then to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the collector's reach so gc passes
+    # in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Runs in each worker before it accepts connections
+    from app import warmup
+    warmup()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker on shutdown: commit the submissions still queued and
+    # merge the norms observed since the last flush
+    from app import norms_store, submission_log
+    if submission_log is not None:
+        submission_log.close()
+    norms_store.close()
@@ -0,0 +1,354 @@
+import bisect
+import json
+import math
+import os
+import sqlite3
+import threading
+
+from instrumentation import REGISTRY
+from scoring import SCHEMA_NAMES
+from sqlite_store import SQLiteConnections
+
+# -----------------------------
+# POPULATION NORMS (streaming quantile sketches per schema)
+#
+# Every computed result feeds its 18 raw schema scores into one t-digest
+# and one running mean/variance per schema. Percentile lookups binary-search
+# the digest's compressed centroids, so they stay O(log n) however many
+# respondents have been seen. Norms are kept per data version, since a
+# weight change shifts every score distribution.
+# -----------------------------
+norm_flushes = REGISTRY.counter('lrs_norms_flushes_total', 'Norm sketch merges into the shared store.')
+norm_observations = REGISTRY.counter('lrs_norms_observations_total', 'Results fed into the norm sketches.')
+
+
+class TDigest:
+    # Merging t-digest: points are buffered, then sorted and merged into
+    # centroids whose weight is capped at 4 * n * q * (1 - q) / compression,
+    # keeping the tails precise.
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.total = 0.0  # weight held in centroids
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._before = []  # weight of all centroids before centroid i
+
+    @property
+    def count(self):
+        return self.total + sum(w for _, w in self._buffer)
+
+    def add(self, value, weight=1.0):
+        self._buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression:
+            self.compress()
+
+    def merge(self, other):
+        other.compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+
+    def compress(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+
+        means, weights = [], []
+        mean, weight = points[0]
+        done = 0.0
+        for next_mean, next_weight in points[1:]:
+            proposed = weight + next_weight
+            q0 = done / total
+            q2 = (done + proposed) / total
+            if proposed <= 4 * total * min(q0 * (1 - q0), q2 * (1 - q2)) / self.compression:
+                mean += (next_mean - mean) * next_weight / proposed
+                weight = proposed
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+
+        before = []
+        running = 0.0
+        for w in weights:
+            before.append(running)
+            running += w
+        self.means, self.weights, self.total, self._before = means, weights, total, before
+
+    def cdf(self, value):
+        # Fraction of weight below value, ties counted half. Points still in
+        # the buffer are counted exactly, so lookups never force a compress.
+        count = self.count
+        if count == 0:
+            return None
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+        below = self._centroid_rank(value) if self.means else 0.0
+        for point, weight in self._buffer:
+            if point < value:
+                below += weight
+            elif point == value:
+                below += weight / 2
+        return below / count
+
+    def _centroid_rank(self, value):
+        # Centroid weight below value, interpolated between centroid centres
+        n = len(self.means)
+        lo = bisect.bisect_left(self.means, value)
+        hi = bisect.bisect_right(self.means, value)
+        if lo < hi:
+            end = self._before[hi - 1] + self.weights[hi - 1]
+            return (self._before[lo] + end) / 2
+        # Interpolate between the neighbouring centroid centres (or min/max)
+        if hi == 0:
+            left_x, left_c = self.min, 0.0
+        else:
+            left_x, left_c = self.means[hi - 1], self._before[hi - 1] + self.weights[hi - 1] / 2
+        if hi == n:
+            right_x, right_c = self.max, self.total
+        else:
+            right_x, right_c = self.means[hi], self._before[hi] + self.weights[hi] / 2
+        if right_x <= left_x:
+            return right_c
+        return left_c + (right_c - left_c) * (value - left_x) / (right_x - left_x)
+
+    def quantile(self, q):
+        self.compress()
+        if not self.means:
+            return None
+        target = q * self.total
+        centres = [b + w / 2 for b, w in zip(self._before, self.weights)]
+        i = bisect.bisect_left(centres, target)
+        if i == 0:
+            left_x, left_c, right_x, right_c = self.min, 0.0, self.means[0], centres[0]
+        elif i == len(centres):
+            left_x, left_c, right_x, right_c = self.means[-1], centres[-1], self.max, self.total
+        else:
+            left_x, left_c, right_x, right_c = self.means[i - 1], centres[i - 1], self.means[i], centres[i]
+        if right_c <= left_c:
+            return right_x
+        return left_x + (right_x - left_x) * (target - left_c) / (right_c - left_c)
+
+    def to_dict(self):
+        self.compress()
+        return {"compression": self.compression, "means": self.means, "weights": self.weights,
+                "min": self.min if self.means else None, "max": self.max if self.means else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data['compression'])
+        digest._buffer = list(zip(data['means'], data['weights']))
+        if data['means']:
+            digest.min, digest.max = data['min'], data['max']
+        digest.compress()
+        return digest
+
+
+class SchemaNorm:
+    # Quantile sketch plus running moments (Welford) for one schema
+    def __init__(self, compression=100):
+        self.digest = TDigest(compression)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.digest.add(value)
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.digest.merge(other.digest)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_json(self):
+        return json.dumps({"digest": self.digest.to_dict(), "n": self.n, "mean": self.mean, "m2": self.m2})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        norm = cls()
+        norm.digest = TDigest.from_dict(data['digest'])
+        norm.n, norm.mean, norm.m2 = data['n'], data['mean'], data['m2']
+        return norm
+
+
+class NormSet:
+    # Norms for one data version. `view` answers lookups; `delta` holds this
+    # process's observations not yet merged into the shared store.
+    def __init__(self, version, min_count, compression=100):
+        self.version = version
+        self.min_count = min_count
+        self.compression = compression
+        self.view = [SchemaNorm(compression) for _ in SCHEMA_NAMES]
+        self.delta = [SchemaNorm(compression) for _ in SCHEMA_NAMES]
+        self.lock = threading.Lock()
+
+    def describe(self, s, score):
+        # (percentile 0-100, z-score), or (None, None) until enough results are in
+        score = float(score)
+        with self.lock:
+            norm = self.view[s]
+            if norm.n < self.min_count or not math.isfinite(score):
+                return None, None
+            fraction = norm.digest.cdf(score)
+            mean, std = norm.mean, norm.std
+        percentile = None if fraction is None else round(fraction * 100, 1)
+        z_score = round((score - mean) / std, 2) if std > 0 else 0.0
+        return percentile, z_score
+
+    def observe(self, scores):
+        with self.lock:
+            for s, score in enumerate(scores):
+                score = float(score)
+                if math.isfinite(score):
+                    self.view[s].add(score)
+                    self.delta[s].add(score)
+        norm_observations.inc()
+
+    def summary(self, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        with self.lock:
+            return [{
+                "name": name,
+                "count": norm.n,
+                "mean": round(norm.mean, 3),
+                "std": round(norm.std, 3),
+                "quantiles": {f"p{round(q * 100)}": norm.digest.quantile(q) for q in quantiles},
+            } for name, norm in zip(SCHEMA_NAMES, self.view)]
+
+
+class NormsStore:
+    # Holds the NormSet of each data version. With a SQLite path, a
+    # background thread merges this process's deltas into the file every
+    # `flush_interval` seconds and refreshes the view from it, so all workers
+    # converge on the same norms while requests only touch memory. close()
+    # merges what is left.
+    def __init__(self, path=None, min_count=100, flush_interval=10.0):
+        self.path = path
+        self.min_count = min_count
+        self.flush_interval = flush_interval
+        self._sets = {}
+        self._lock = threading.Lock()
+        self._db = SQLiteConnections(path, [
+            "CREATE TABLE IF NOT EXISTS schema_norms (version TEXT NOT NULL, "
+            "schema INTEGER NOT NULL, state TEXT NOT NULL, PRIMARY KEY (version, schema))"]) if path else None
+        self._flusher_pid = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def get(self, version):
+        if self.path and self._flusher_pid != os.getpid():
+            self._start_flusher()
+        norm_set = self._sets.get(version)
+        if norm_set is None:
+            with self._lock:
+                norm_set = self._sets.get(version)
+                if norm_set is None:
+                    norm_set = NormSet(version, self.min_count)
+                    self._sets = {version: norm_set}  # older versions are dropped
+                    self._wake.set()  # load the stored norms right away
+        return norm_set
+
+    def observe(self, norm_set, rows):
+        for scores in rows:
+            norm_set.observe(scores)
+
+    def _start_flusher(self):
+        # Threads do not survive fork, so each worker process starts its own
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name='norms-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            for norm_set in list(self._sets.values()):
+                self.flush(norm_set)
+
+    def close(self):
+        # Stop the flusher and merge this process's unflushed observations
+        if not self.path:
+            return
+        if self._flusher_pid == os.getpid():
+            self._stop.set()
+            self._wake.set()
+            self._flusher.join()
+        for norm_set in list(self._sets.values()):
+            if any(norm.n for norm in norm_set.delta):
+                self.flush(norm_set)
+
+    def flush(self, norm_set):
+        try:
+            self._sync(norm_set)
+            norm_flushes.inc()
+        except sqlite3.Error as e:
+            print(f"Norms flush failed: {e}")
+
+    def _sync(self, norm_set):
+        # Merge this process's delta into the stored norms and adopt the result
+        with norm_set.lock:
+            delta = norm_set.delta
+            norm_set.delta = [SchemaNorm(norm_set.compression) for _ in SCHEMA_NAMES]
+
+        conn = None
+        try:
+            conn = self._db.get()
+            conn.execute("BEGIN IMMEDIATE")
+            stored = {s: SchemaNorm.from_json(state) for s, state in conn.execute(
+                "SELECT schema, state FROM schema_norms WHERE version = ?", (norm_set.version,))}
+            merged = []
+            for s, local in enumerate(delta):
+                norm = stored.get(s) or SchemaNorm(norm_set.compression)
+                merged.append(norm)
+                if local.n == 0:
+                    continue
+                norm.merge(local)
+                conn.execute("INSERT OR REPLACE INTO schema_norms (version, schema, state) VALUES (?, ?, ?)",
+                             (norm_set.version, s, norm.to_json()))
+            conn.execute("COMMIT")
+        except BaseException:
+            # Hand the observations back so the next flush retries them
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with norm_set.lock:
+                for s, local in enumerate(delta):
+                    norm_set.delta[s].merge(local)
+            raise
+
+        with norm_set.lock:
+            # Observations made while syncing are in the new delta; add them on top
+            for s, norm in enumerate(merged):
+                norm.merge(norm_set.delta[s])
+            norm_set.view = merged
@@ -0,0 +1,54 @@
+import gzip
+import hashlib
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+# -----------------------------
+# PREPARED RESPONSES (serialized and compressed once)
+# -----------------------------
+class PreparedResponse:
+    # A response body kept as raw and precompressed bytes, with one strong
+    # ETag per encoding, served without re-serializing on each request
+    def __init__(self, body, mimetype, cache_control, compress=True, compressed=None):
+        # `compressed` supplies encodings prepared ahead of time (data cache)
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        self.variants = {'identity': body}
+        if compressed is None:
+            compressed = {}
+            if compress:
+                compressed['gzip'] = gzip.compress(body, 9, mtime=0)
+                if brotli is not None:
+                    compressed['br'] = brotli.compress(body)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                self.variants[encoding] = data
+        self.etags = {encoding: digest if encoding == 'identity' else f"{digest}-{encoding}"
+                      for encoding in self.variants}
+
+    def _negotiate(self):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def respond(self):
+        encoding = self._negotiate()
+        if any(request.if_none_match.contains_weak(tag) for tag in self.etags.values()):
+            response = Response(status=304)
+        else:
+            response = Response(self.variants[encoding], mimetype=self.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etags[encoding])
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
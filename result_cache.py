@@ -0,0 +1,134 @@
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from instrumentation import REGISTRY
+from scoring import normalize_answer
+from sqlite_store import SQLiteConnections
+
+# -----------------------------
+# RESULT CACHE (content-addressed by answers + data version)
+#
+# Values are the raw schema score vectors, not response bodies: percentiles
+# move as the norms fill up, so results are ranked per request. The in-process
+# tier is an LRU with a TTL; an optional SQLite file shared by all workers
+# sits behind it so a result computed by one worker is a hit for the rest.
+# -----------------------------
+cache_lookups = REGISTRY.counter(
+    'lrs_result_cache_lookups_total', 'Result cache lookups by outcome.', ['result'])
+cache_evictions = REGISTRY.counter(
+    'lrs_result_cache_evictions_total', 'Entries evicted from the in-process result cache.', ['reason'])
+cache_entries = REGISTRY.gauge(
+    'lrs_result_cache_entries', 'Entries held by the in-process result cache.')
+
+
+def answers_key(model, answers, version):
+    # Canonical form: only answers the model can score, numbers (and numeric
+    # strings) as floats, text lowercased (matching ignores case), sorted by
+    # question ID. Equivalent payloads therefore share a key.
+    items = []
+    for q_id, value in answers.items():
+        if q_id not in model.question_index:
+            continue
+        value = normalize_answer(value)
+        if value is None:
+            continue
+        items.append((q_id, value.lower() if isinstance(value, str) else value))
+    items.sort()
+    canonical = json.dumps(['scores', version, items], separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def pack_scores(scores):
+    return np.asarray(scores, dtype='<f8').tobytes()
+
+
+def unpack_scores(value):
+    return np.frombuffer(value, dtype='<f8')
+
+
+class SQLiteCacheBackend:
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._db = SQLiteConnections(path, [
+            "CREATE TABLE IF NOT EXISTS result_cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"])
+        self._puts = 0
+
+    def get(self, key):
+        row = self._db.get().execute(
+            "SELECT value, created FROM result_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return bytes(row[0])
+
+    def put(self, key, value):
+        conn = self._db.get()
+        conn.execute("INSERT OR REPLACE INTO result_cache (key, value, created) VALUES (?, ?, ?)",
+                     (key, value, time.time()))
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM result_cache WHERE created < ?", (time.time() - self.ttl,))
+            conn.execute("DELETE FROM result_cache WHERE key IN (SELECT key FROM result_cache "
+                         "ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+class ResultCache:
+    def __init__(self, max_entries=10000, ttl=3600.0, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = collections.OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    cache_lookups.inc(result='hit')
+                    return entry[1]
+                del self._entries[key]
+                cache_evictions.inc(reason='expired')
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except sqlite3.Error as e:
+                print(f"Shared result cache read failed: {e}")
+                value = None
+            if value is not None:
+                cache_lookups.inc(result='shared_hit')
+                self._store(key, value)
+                return value
+
+        cache_lookups.inc(result='miss')
+        return None
+
+    def put(self, key, value):
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.put(key, value)
+            except sqlite3.Error as e:
+                print(f"Shared result cache write failed: {e}")
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                cache_evictions.inc(reason='size')
+            cache_entries.set(len(self._entries))
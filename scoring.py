@@ -0,0 +1,588 @@
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+from instrumentation import REGISTRY
+
+# -----------------------------
+# DATA FILES
+# -----------------------------
+# CSV file names — MUST EXACTLY MATCH your uploaded files in repo
+QUESTIONS_FILE = "LRS_Beta_QA.csv"
+WEIGHT_MAP_FILE = "LRS_BETA_Weighted_Score_Map.csv"
+SCHEMA_INFO_FILE = "LRS_Beta_Young_18_Schemas.csv"
+KEYWORDS_FILE = "LRS_Beta_Schema_Keywords.csv"
+
+# -----------------------------
+# DATA LOADER (safe for CSV or misnamed XLSX)
+# -----------------------------
+data_file_load_seconds = REGISTRY.gauge(
+    'lrs_data_file_load_seconds', 'Time taken by the last load of each data file.', ['file'])
+data_file_load_failures = REGISTRY.counter(
+    'lrs_data_file_load_failures_total', 'Data file loads that returned no data.', ['file'])
+
+
+def load_data_file(filename):
+    start = time.perf_counter()
+    df = _read_data_file(filename)
+    data_file_load_seconds.set(time.perf_counter() - start, file=filename)
+    if df is None:
+        data_file_load_failures.inc(file=filename)
+    return df
+
+
+def _read_data_file(filename):
+    if not os.path.exists(filename):
+        print(f"File not found: {filename}")
+        return None
+    # Imported here: the server only needs pandas when compiling the data cache
+    import pandas as pd
+    try:
+        return pd.read_csv(filename)
+    except Exception as e1:
+        print(f"CSV read failed for {filename}: {e1}")
+        try:
+            return pd.read_excel(filename)
+        except Exception as e2:
+            print(f"Excel read also failed for {filename}: {e2}")
+            return None
+
+# -----------------------------
+# FULL SCHEMA DATA (hardcoded fallback with complete 4-week plans)
+# -----------------------------
+fallback_schemas = [
+    {
+        "name": "Abandonment / Instability",
+        "category": "Disconnection & Rejection",
+        "causes": "Unstable or unreliable caregiving; fear that close others will leave.",
+        "symptoms": "Intense fear of loss, clinginess or avoidance in relationships, jealousy, emotional volatility.",
+        "manifestations": "Connection (attachment worry), Roots (parent absence/loss), Stability (world anxiety)",
+        "plan": {
+            "week1": "Trigger Mapping: Record every time you feel 'abandonment panic'. Note the objective trigger vs. the internal fear.",
+            "week2": "The Healthy Adult Voice: Practice the thought: 'I am an adult now. Even if this person leaves, I can care for myself.'",
+            "week3": "Planned Separation: Spend an evening alone without checking social media. Practice self-soothing in the silence.",
+            "week4": "Relapse Prevention: Identify 3 healthy ways to ask for reassurance without testing or accusing your partner."
+        }
+    },
+    {
+        "name": "Mistrust / Abuse",
+        "category": "Disconnection & Rejection",
+        "causes": "Abuse, betrayal, or manipulation by caregivers/others.",
+        "symptoms": "Expectation of harm/deception, hypervigilance, difficulty trusting, may test or provoke others.",
+        "manifestations": "Roots (abuse/trauma items), Connection (trust difficulty), Environment (safety concerns)",
+        "plan": {
+            "week1": "Evidence Checking: Pick one person you distrust. List evidence 'for' and 'against' the belief they intend harm.",
+            "week2": "Boundary Training: Practice saying 'I’m not comfortable with that' to minor requests to build internal safety.",
+            "week3": "Vulnerability Experiment: Share one minor personal opinion with a safe person. Observe the safety.",
+            "week4": "Trust Pacing: Categorize people into 'Trust Levels' (1-5). Share only level-appropriate info."
+        }
+    },
+    {
+        "name": "Emotional Deprivation",
+        "category": "Disconnection & Rejection",
+        "causes": "Lack of nurturance, empathy, or affection from caregivers.",
+        "symptoms": "Belief no one will meet emotional needs, loneliness, difficulty asking for support, choosing depriving partners.",
+        "manifestations": "Connection (closeness/intimacy), Roots (neglect/affection lack), Vitality (mood)",
+        "plan": {
+            "week1": "Need Awareness: Every time you feel empty, write down what you needed: Empathy, Protection, or Nurturance.",
+            "week2": "Cognitive Flashcard: Create a card: 'My feeling that no one cares is a schema memory, not a current fact.'",
+            "week3": "Active Request: Ask a trusted person for 10 minutes of active listening regarding a small stressor.",
+            "week4": "Inner Nurturing: Schedule one activity weekly that feels 'nurturing' to your inner child."
+        }
+    },
+    {
+        "name": "Defectiveness / Shame",
+        "category": "Disconnection & Rejection",
+        "causes": "Criticism, rejection, or shaming; feeling inherently flawed.",
+        "symptoms": "Deep shame, self-loathing, hypersensitivity to criticism, hiding 'defects', self-sabotage in relationships.",
+        "manifestations": "Digital Wellbeing (comparison), Meaning (self-worth), Roots (insults/shame)",
+        "plan": {
+            "week1": "Critic Audit: Name your inner critic (e.g., 'The Judge'). Note how often it speaks and the words it uses.",
+            "week2": "Humanity Re-framing: When you make a mistake, say: 'This is a common human experience, not a defect.'",
+            "week3": "Mirror Work: Spend 2 minutes daily looking at yourself saying: 'I am worthy of kindness regardless of flaws.'",
+            "week4": "Compassionate Letter: Write a letter to yourself from the perspective of a wise friend regarding a past mistake."
+        }
+    },
+    {
+        "name": "Social Isolation / Alienation",
+        "category": "Disconnection & Rejection",
+        "causes": "Feeling different or excluded from family/peers.",
+        "symptoms": "Sense of being outsider, avoidance of groups despite longing, feeling no one understands.",
+        "manifestations": "Connection (outsider feelings), Environment (spaces/personal identity), Digital Wellbeing (comparison)",
+        "plan": {
+            "week1": "Similarity Search: In every social setting, find 3 things you have in common with others.",
+            "week2": "Small Talk Script: Prepare 3 open-ended questions to use in conversations.",
+            "week3": "Group Activity: Attend one low-pressure social event (e.g., class, meetup).",
+            "week4": "Reflection: Write what went better than expected and plan next social step."
+        }
+    },
+    {
+        "name": "Dependence / Incompetence",
+        "category": "Impaired Autonomy & Performance",
+        "causes": "Overprotection or discouragement of independence.",
+        "symptoms": "Belief one is incapable, excessive reliance on others, avoidance of responsibility, helplessness.",
+        "manifestations": "Growth (coping/capability), Vitality (focus/energy), Roots (parentification)",
+        "plan": {
+            "week1": "Competence Log: Track 5 daily tasks you completed independently.",
+            "week2": "Decision Practice: Make 3 small decisions without asking for advice.",
+            "week3": "Skill Building: Choose one simple task you've avoided and complete it step-by-step.",
+            "week4": "Reflection: List evidence of your growing capability."
+        }
+    },
+    {
+        "name": "Vulnerability to Harm or Illness",
+        "category": "Impaired Autonomy & Performance",
+        "causes": "Exaggerated danger or traumatic events.",
+        "symptoms": "Catastrophizing, excessive precaution, phobias, hypochondria.",
+        "manifestations": "Vitality (health/resilience), Environment (safety/noise/light), Stability (world anxiety)",
+        "plan": {
+            "week1": "Worry Time: Schedule 15 minutes daily to write all worries, then stop.",
+            "week2": "Probability Estimation: Rate likelihood of feared event (0-100%) and check evidence.",
+            "week3": "Exposure Step: Face one small feared situation (e.g., short trip).",
+            "week4": "Safety Review: List all times feared event did NOT happen."
+        }
+    },
+    {
+        "name": "Enmeshment / Undeveloped Self",
+        "category": "Impaired Autonomy & Performance",
+        "causes": "Over-involved caregivers; no separate identity encouraged.",
+        "symptoms": "Lack of individual direction, guilt when separate, fusion with others' emotions/needs.",
+        "manifestations": "Connection (preoccupation), Meaning (choices/values), Roots (household mental illness)",
+        "plan": {
+            "week1": "Identity List: Write 10 things you like that are independent of others.",
+            "week2": "Boundary Practice: Say 'I need time to think' to one request.",
+            "week3": "Solo Activity: Spend 2 hours on a personal interest without sharing.",
+            "week4": "Reflection: Notice how separate choices feel empowering."
+        }
+    },
+    {
+        "name": "Failure",
+        "category": "Impaired Autonomy & Performance",
+        "causes": "Criticism or comparison leading to belief in inevitable failure.",
+        "symptoms": "Avoidance of challenges, self-sabotage, underachievement despite ability.",
+        "manifestations": "Growth (achievement/perfection), Stability (financial plan), Vitality (energy)",
+        "plan": {
+            "week1": "Success Inventory: List 10 past achievements, big or small.",
+            "week2": "Growth Mindset: Replace 'I failed' with 'I learned'.",
+            "week3": "Small Challenge: Complete one avoided task with realistic goal.",
+            "week4": "Celebrate Effort: Reward process, not just outcome."
+        }
+    },
+    {
+        "name": "Entitlement / Grandiosity",
+        "category": "Impaired Limits",
+        "causes": "Overindulgence or lack of limits.",
+        "symptoms": "Belief one is superior, demands special treatment, lack of empathy/reciprocal responsibility.",
+        "manifestations": "Growth (deservingness/empathy), Digital Wellbeing (rules/control)",
+        "plan": {
+            "week1": "Empathy Log: Note one need of another person daily.",
+            "week2": "Equality Reminder: 'Everyone's needs matter equally'.",
+            "week3": "Delay Gratification: Wait 24h for one non-essential want.",
+            "week4": "Gratitude Practice: Thank someone for meeting a reasonable need."
+        }
+    },
+    {
+        "name": "Insufficient Self-Control / Self-Discipline",
+        "category": "Impaired Limits",
+        "causes": "Lack of structure or consequences.",
+        "symptoms": "Difficulty tolerating frustration, impulsivity, avoidance of discomfort needed for goals.",
+        "manifestations": "Digital Wellbeing (scrolling/notifications), Stability (savings), Growth (procrastination)",
+        "plan": {
+            "week1": "Impulse Log: Track urges and delay action by 10 minutes.",
+            "week2": "If-Then Planning: 'If I feel urge to scroll, then I stand up and stretch'.",
+            "week3": "Commitment Device: Use app blocker for one habit.",
+            "week4": "Reward System: Plan healthy reward after completing task."
+        }
+    },
+    {
+        "name": "Subjugation",
+        "category": "Other-Directedness",
+        "causes": "Punishment for asserting needs; dominance in family.",
+        "symptoms": "Suppression of anger/needs to avoid retaliation, passive compliance, bottled resentment.",
+        "manifestations": "Connection (suppression/peace), Growth (conflict avoidance)",
+        "plan": {
+            "week1": "Need Awareness: Write down 3 suppressed wants daily.",
+            "week2": "Low-Risk Assertion: Express one small preference ('I’d prefer X').",
+            "week3": "Anger Journal: Safely write unsent letter expressing resentment.",
+            "week4": "Boundary Setting: Practice 'No' to one reasonable request."
+        }
+    },
+    {
+        "name": "Self-Sacrifice",
+        "category": "Other-Directedness",
+        "causes": "Guilt or modeling of excessive giving.",
+        "symptoms": "Over-focus on others' needs, neglect own, resentment, burnout.",
+        "manifestations": "Meaning (helping/meaning), Connection (preoccupation), Roots (parentification)",
+        "plan": {
+            "week1": "Giving Audit: Track time/energy given vs. received.",
+            "week2": "Self-Care Priority: Schedule one non-negotiable self-need daily.",
+            "week3": "Balanced Helping: Offer help only when you genuinely want to.",
+            "week4": "Guilt Reframe: 'Meeting my needs allows me to help others sustainably.'"
+        }
+    },
+    {
+        "name": "Approval-Seeking / Recognition-Seeking",
+        "category": "Other-Directedness",
+        "causes": "Love conditional on performance/appearance.",
+        "symptoms": "Excessive need for admiration, identity based on external validation, conformity.",
+        "manifestations": "Digital Wellbeing (validation/likes), Meaning (respect), Growth (worth)",
+        "plan": {
+            "week1": "Validation Source: List 5 internal qualities you value in yourself.",
+            "week2": "Social Media Fast: 1 day without seeking likes/comments.",
+            "week3": "Intrinsic Goal: Do one activity for personal enjoyment, not sharing.",
+            "week4": "Self-Approval Practice: Daily affirm 'My worth is inherent'."
+        }
+    },
+    {
+        "name": "Negativity / Pessimism",
+        "category": "Overvigilance & Inhibition",
+        "causes": "Focus on negative in family; repeated hardship.",
+        "symptoms": "Chronic focus on negatives, worry, discounting positives, life feels bleak.",
+        "manifestations": "Vitality (mood/energy), Stability (world anxiety), Meaning (gratitude/peace)",
+        "plan": {
+            "week1": "3 Good Things: Write 3 positive events daily and why they happened.",
+            "week2": "Evidence Testing: For one worry, list evidence for/against.",
+            "week3": "Gratitude Visit: Write and deliver (or read) a gratitude letter.",
+            "week4": "Best Possible Self: Visualize and write about your ideal future."
+        }
+    },
+    {
+        "name": "Emotional Inhibition",
+        "category": "Overvigilance & Inhibition",
+        "causes": "Suppression of emotions shamed or punished.",
+        "symptoms": "Restraint of feelings, fear of losing control, appear rigid/cold, difficulty with spontaneity.",
+        "manifestations": "Connection (hiding feelings), Digital Wellbeing (curating self), Vitality (mood)",
+        "plan": {
+            "week1": "Emotion Labeling: Name feelings 5 times daily.",
+            "week2": "Safe Expression: Share one feeling with a trusted person.",
+            "week3": "Body Awareness: Notice where emotions live in your body.",
+            "week4": "Play Experiment: Do one spontaneous, fun activity."
+        }
+    },
+    {
+        "name": "Unrelenting Standards / Hypercriticalness",
+        "category": "Overvigilance & Inhibition",
+        "causes": "High pressure for performance; criticism for imperfection.",
+        "symptoms": "Perfectionism, chronic dissatisfaction, burnout, harsh self/other judgment.",
+        "manifestations": "Growth (perfection/strive), Meaning (peace), Connection (suppression)",
+        "plan": {
+            "week1": "Standards Audit: List your 'shoulds' and question necessity.",
+            "week2": "Good Enough Goal: Complete one task to 80% standard deliberately.",
+            "week3": "Self-Compassion Break: Use Kristin's phrase during criticism.",
+            "week4": "Balance Review: Schedule equal time for achievement and rest."
+        }
+    },
+    {
+        "name": "Punitiveness",
+        "category": "Overvigilance & Inhibition",
+        "causes": "Harsh punishment; intolerance of mistakes.",
+        "symptoms": "Self-punishing or punitive toward others, difficulty forgiving errors.",
+        "manifestations": "Vitality (guilt/appetite), Growth (critical mistakes), Roots (cruel discipline)",
+        "plan": {
+            "week1": "Mistake Log: Write mistakes without judgment.",
+            "week2": "Forgiveness Letter: Write (unsent) forgiving yourself or another.",
+            "week3": "Mercy Practice: Respond to one mistake with kindness phrase.",
+            "week4": "Common Humanity: Remind 'Everyone makes mistakes' daily."
+        }
+    }
+]
+
+# -----------------------------
+# COMPILED SCORING MODEL (built once from the weight map)
+# -----------------------------
+SCHEMA_NAMES = [schema['name'] for schema in fallback_schemas]
+
+# Keyword table for open-ended answers (hardcoded fallback for KEYWORDS_FILE)
+# Simple keyword-based "AI" for demo - in real, use xAI API or Grok
+fallback_keywords = {
+    "Abandonment / Instability": ["abandon", "leave", "unstable", "loss"],
+    "Mistrust / Abuse": ["abuse", "betray", "deceive", "hurt", "mistrust"],
+    "Emotional Deprivation": ["deprived", "lonely", "unloved", "neglect"],
+    "Defectiveness / Shame": ["defect", "shame", "flawed", "unworthy"],
+    "Social Isolation / Alienation": ["isolate", "alien", "outsider", "excluded"],
+    "Dependence / Incompetence": ["depend", "incompetent", "helpless"],
+    "Vulnerability to Harm or Illness": ["vulnerable", "harm", "illness", "danger"],
+    "Enmeshment / Undeveloped Self": ["enmesh", "undeveloped", "fusion"],
+    "Failure": ["fail", "underachieve", "inadequate"],
+    "Entitlement / Grandiosity": ["entitle", "grand", "superior", "special"],
+    "Insufficient Self-Control / Self-Discipline": ["impulse", "lack control", "discipline"],
+    "Subjugation": ["subjugate", "suppress", "give in"],
+    "Self-Sacrifice": ["sacrifice", "overgive", "neglect self"],
+    "Approval-Seeking / Recognition-Seeking": ["approve", "seek recognition", "validation"],
+    "Negativity / Pessimism": ["negative", "pessim", "bleak"],
+    "Emotional Inhibition": ["inhibit emotion", "suppress feeling", "rigid"],
+    "Unrelenting Standards / Hypercriticalness": ["unrelent standard", "hypercritic", "perfection"],
+    "Punitiveness": ["punitive", "unforgiving", "self-punish"]
+}
+
+
+def load_keyword_table(df):
+    if df is None:
+        return fallback_keywords
+    table = {}
+    for schema_name, keyword in zip(df['Schema Name'].tolist(), df['Keyword'].tolist()):
+        keyword = str(keyword).strip().lower()
+        if keyword:
+            table.setdefault(str(schema_name).strip(), []).append(keyword)
+    return table
+
+
+def _trie_pattern(node):
+    # node maps a character to its child node; '' marks the end of a keyword
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # Greedy optional: prefer the longer keyword, fall back to this one
+        return '(?:' + pattern + ')?'
+    return pattern
+
+
+class KeywordMatcher:
+    # All keywords compiled into one trie-shaped regex, so each answer is
+    # scanned once however many keywords there are. Each match is the longest
+    # keyword starting at that position; shorter keywords it contains are
+    # credited through `implied`, so results stay identical to testing every
+    # keyword as a substring.
+    def __init__(self, keyword_table):
+        self.keyword_table = keyword_table
+        keyword_schemas = {}
+        for s, s_name in enumerate(SCHEMA_NAMES):
+            for kw in keyword_table.get(s_name, ()):
+                keyword_schemas.setdefault(kw, set()).add(s)
+
+        self.implied = {}
+        for kw in keyword_schemas:
+            schemas = set()
+            for other, other_schemas in keyword_schemas.items():
+                if other in kw:
+                    schemas |= other_schemas
+            self.implied[kw] = sorted(schemas)
+
+        trie = {}
+        for kw in keyword_schemas:
+            node = trie
+            for char in kw:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.pattern = re.compile(_trie_pattern(trie)) if trie else None
+
+    def match(self, text):
+        # Returns the indices (into SCHEMA_NAMES) of schemas mentioned in text
+        matched = set()
+        if self.pattern is None:
+            return matched
+        text = text.lower()
+        found = self.pattern.search(text)
+        while found:
+            matched.update(self.implied[found.group()])
+            # Restart just past the match start so overlapping keywords are seen
+            found = self.pattern.search(text, found.start() + 1)
+        return matched
+
+
+class ScoringModel:
+    # Dense (questions x schemas) view of the weight map:
+    #   weights      - raw weight of each (question, schema) cell
+    #   reverse      - True where the cell uses reverse scoring
+    #   signed       - per-unit contribution of a numeric answer (-w when reversed)
+    #   offsets      - constant part of a reversed cell (6 * w), added when answered
+    #   text_weights - summed row weight per question, used for open-ended answers
+    #   matcher      - compiled keyword matcher for open-ended answers
+    #   question_entries - per question, the (schema, signed, offset) cells it
+    #                  touches, for updating running totals one answer at a time
+    def __init__(self, question_index, weights, reverse, text_weights, matcher):
+        self.question_index = question_index
+        self.weights = weights
+        self.reverse = reverse
+        self.signed = np.where(reverse, -weights, weights)
+        self.offsets = np.where(reverse, 6.0 * weights, 0.0)
+        self.text_weights = text_weights
+        self.matcher = matcher
+        self.question_entries = [
+            tuple((int(s), float(self.signed[q, s]), float(self.offsets[q, s]))
+                  for s in np.flatnonzero(weights[q]))
+            for q in range(len(question_index))
+        ]
+
+
+def _column(df, name, default):
+    if name in df.columns:
+        return df[name].tolist()
+    return [default] * len(df)
+
+
+def compile_scoring_model(df, keyword_table=fallback_keywords):
+    if df is None:
+        return None
+
+    # Same column lookups the per-row loop used to do
+    if 'Question ID' in df.columns:
+        q_ids = df['Question ID'].tolist()
+    else:
+        q_ids = _column(df, 'ID', '')
+    schema_names = _column(df, 'Schema Name', '')
+    weights = _column(df, 'Weight', 1.0)
+    directions = _column(df, 'SCORING LOGIC', '')
+
+    question_index = {}
+    for q_id in q_ids:
+        question_index.setdefault(str(q_id).strip(), len(question_index))
+    schema_index = {name: i for i, name in enumerate(SCHEMA_NAMES)}
+
+    weight_matrix = np.zeros((len(question_index), len(SCHEMA_NAMES)))
+    reverse_mask = np.zeros(weight_matrix.shape, dtype=bool)
+    text_weights = np.zeros(len(question_index))
+
+    for q_id, schema_name, weight, direction in zip(q_ids, schema_names, weights, directions):
+        q = question_index[str(q_id).strip()]
+        weight = float(weight)
+        # Free-text answers score every row of the question, whatever its schema
+        text_weights[q] += weight
+        s = schema_index.get(str(schema_name).strip())
+        if s is None:
+            continue
+        weight_matrix[q, s] += weight
+        reverse_mask[q, s] = 'reverse' in str(direction).strip().lower()
+
+    return ScoringModel(question_index, weight_matrix, reverse_mask, text_weights,
+                        KeywordMatcher(keyword_table))
+
+
+# Strings that spell a plain decimal number ("3", " 2.5 ") score as that number
+NUMERIC_STRING = re.compile(r'\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*')
+
+
+def normalize_answer(value):
+    # Returns a float for numeric answers, the text for open-ended ones and
+    # None for anything that cannot be scored
+    if isinstance(value, str):
+        if NUMERIC_STRING.fullmatch(value):
+            return float(value)
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def score_answer_matrix(model, answer_sets, timings=None):
+    # Encode N answer dicts as an (N x questions) answer matrix plus an
+    # answered mask, then score them all with two matrix products.
+    # Non-finite answers (inf, NaN) stay out of the products, where they
+    # would turn every schema into NaN through inf * 0; they are added to
+    # the cells of their own question only, like the per-row loop did.
+    # When given, `timings` receives the seconds spent per stage:
+    # 'parse', 'text_match' and 'matrix'.
+    start = time.perf_counter()
+    text_time = 0.0
+    n = len(answer_sets)
+    values = np.zeros((n, len(model.question_index)))
+    answered = np.zeros(values.shape)
+    text_scores = np.zeros((n, len(SCHEMA_NAMES)))
+    non_finite = []
+
+    for i, user_answers in enumerate(answer_sets):
+        for q_id, answer_value in user_answers.items():
+            q = model.question_index.get(q_id)
+            if q is None:
+                continue
+            answer_value = normalize_answer(answer_value)
+            if answer_value is None:
+                continue
+            if isinstance(answer_value, str):
+                # AI synthesis for open-ended
+                match_start = time.perf_counter()
+                for s in model.matcher.match(answer_value):
+                    text_scores[i, s] += model.text_weights[q] * 4  # High score for match
+                text_time += time.perf_counter() - match_start
+            elif not math.isfinite(answer_value):
+                non_finite.append((i, q, answer_value))
+            else:
+                # Numeric answer
+                values[i, q] = answer_value
+                answered[i, q] = 1.0
+
+    encoded = time.perf_counter()
+    scores = values @ model.signed + answered @ model.offsets + text_scores
+    with np.errstate(invalid='ignore'):  # inf + -inf is NaN, as in the loop
+        for i, q, answer_value in non_finite:
+            for s, amount in answer_contribution(model, q, answer_value):
+                scores[i, s] += amount
+    if timings is not None:
+        timings['parse'] = encoded - start - text_time
+        timings['text_match'] = text_time
+        timings['matrix'] = time.perf_counter() - encoded
+    return scores
+
+
+def score_answers(model, user_answers, timings=None):
+    return score_answer_matrix(model, [user_answers], timings)[0]
+
+
+def answer_contribution(model, q, value):
+    # What one normalized answer to question row q adds to the schema totals,
+    # as ((schema index, amount), ...)
+    if isinstance(value, str):
+        amount = float(model.text_weights[q]) * 4  # High score for match
+        return tuple((s, amount) for s in sorted(model.matcher.match(value)))
+    return tuple((s, signed * value + offset) for s, signed, offset in model.question_entries[q])
+
+
+def build_results(scores, norms=None):
+    # With norms (see norms.NormSet) each schema also gets its population
+    # percentile and z-score
+    rounded = [round(float(score), 2) for score in scores]
+    # Stable sort keeps catalog order for tied scores; limit to top 5
+    top = sorted(range(len(rounded)), key=rounded.__getitem__, reverse=True)[:5]
+
+    results = []
+    for i in top:
+        schema = fallback_schemas[i]
+        results.append({
+            "name": schema['name'],
+            "category": schema['category'],
+            "score": rounded[i],
+            "causes": schema['causes'],
+            "symptoms": schema['symptoms'],
+            "manifestations": schema['manifestations'],
+            "plan": schema['plan']
+        })
+        if norms is not None:
+            results[-1]['percentile'], results[-1]['z_score'] = norms.describe(i, scores[i])
+    return results
+
+
+def pack_scoring_model(model):
+    # (header, sections) for the binary data cache; arrays are stored raw
+    header = {
+        "question_ids": list(model.question_index),
+        "shape": list(model.weights.shape),
+        "keyword_table": model.matcher.keyword_table,
+    }
+    sections = {
+        "weights": model.weights.astype('<f8').tobytes(),
+        "reverse": model.reverse.astype('u1').tobytes(),
+        "text_weights": model.text_weights.astype('<f8').tobytes(),
+    }
+    return header, sections
+
+
+def unpack_scoring_model(header, sections):
+    shape = tuple(header['shape'])
+    question_index = {q_id: q for q, q_id in enumerate(header['question_ids'])}
+    weights = np.frombuffer(sections['weights'], dtype='<f8').reshape(shape)
+    reverse = np.frombuffer(sections['reverse'], dtype='u1').reshape(shape).astype(bool)
+    text_weights = np.frombuffer(sections['text_weights'], dtype='<f8')
+    return ScoringModel(question_index, weights, reverse, text_weights,
+                        KeywordMatcher(header['keyword_table']))
+
+
+def load_scoring_model(weight_map_file=WEIGHT_MAP_FILE, keywords_file=KEYWORDS_FILE):
+    return compile_scoring_model(load_data_file(weight_map_file),
+                                 load_keyword_table(load_data_file(keywords_file)))
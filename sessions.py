@@ -0,0 +1,270 @@
+import collections
+import json
+import secrets
+import threading
+import time
+
+from instrumentation import REGISTRY
+from scoring import SCHEMA_NAMES, answer_contribution, normalize_answer
+from sqlite_store import SQLiteConnections
+
+# -----------------------------
+# INCREMENTAL SCORING SESSIONS
+#
+# A session keeps the running score per schema plus, for every answered
+# question, the (schema, amount) pairs that answer added. A new answer adds
+# its pairs to the totals, so each update only touches the schemas that
+# question maps to; changing an answer re-sums just the schemas involved,
+# reading only the answers that feed them.
+# -----------------------------
+session_events = REGISTRY.counter(
+    'lrs_sessions_total', 'Scoring session lifecycle events.', ['event'])
+active_sessions = REGISTRY.gauge(
+    'lrs_sessions_active', 'Scoring sessions held in memory by this process.')
+
+
+class AnswerPairs:
+    # Question ID -> ((schema, amount), ...) for a session held in memory,
+    # indexed by schema so a re-sum reads only the questions that feed it
+    def __init__(self):
+        self._pairs = {}
+        self._by_schema = collections.defaultdict(dict)  # schema -> {question ID: None}, in answer order
+
+    def previous(self, q_ids):
+        return {q_id: self._pairs[q_id] for q_id in q_ids if q_id in self._pairs}
+
+    def set(self, q_id, pairs):
+        self.remove(q_id)
+        self._pairs[q_id] = pairs
+        for s, _ in pairs:
+            self._by_schema[s][q_id] = None
+
+    def remove(self, q_id):
+        for s, _ in self._pairs.pop(q_id, ()):
+            self._by_schema[s].pop(q_id, None)
+
+    def touching(self, schemas):
+        q_ids = dict.fromkeys(q_id for s in schemas for q_id in self._by_schema.get(s, ()))
+        return [self._pairs[q_id] for q_id in q_ids]
+
+
+class ScoringSession:
+    def __init__(self, version, totals=None, answered=0, pairs=None):
+        self.version = version
+        self.totals = totals or [0.0] * len(SCHEMA_NAMES)
+        self.answered = answered
+        self.pairs = pairs if pairs is not None else AnswerPairs()
+
+    def apply(self, model, answers):
+        # A null (or unscorable) value clears an earlier answer to that question
+        changes = {}
+        for q_id, value in answers.items():
+            q = model.question_index.get(q_id)
+            if q is None:
+                continue
+            value = normalize_answer(value)
+            changes[q_id] = None if value is None else answer_contribution(model, q, value)
+        if not changes:
+            return
+
+        previous = self.pairs.previous(changes)
+        rebuild = {s for pairs in previous.values() for s, _ in pairs}
+        for q_id, contribution in changes.items():
+            if contribution is None:
+                if q_id in previous:
+                    self.pairs.remove(q_id)
+                    self.answered -= 1
+                continue
+            self.pairs.set(q_id, contribution)
+            if q_id not in previous:
+                self.answered += 1
+            for s, amount in contribution:
+                if s not in rebuild:
+                    self.totals[s] += amount
+
+        if rebuild:
+            # Re-sum the schemas an overwritten answer touched rather than
+            # subtracting it, so totals stay exact (a NaN cannot be subtracted)
+            for s in rebuild:
+                self.totals[s] = 0.0
+            for pairs in self.pairs.touching(rebuild):
+                for s, amount in pairs:
+                    if s in rebuild:
+                        self.totals[s] += amount
+
+
+class MemorySessionStore:
+    # Sessions live in this process, ordered by last use; idle ones expire
+    def __init__(self, ttl=1800.0, max_sessions=100000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = collections.OrderedDict()  # id -> (last_used, lock, session)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (last_used, _, _) = next(iter(self._sessions.items()))
+            if now - last_used > self.ttl:
+                session_events.inc(event='expired')
+            elif len(self._sessions) > self.max_sessions:
+                session_events.inc(event='evicted')
+            else:
+                break
+            del self._sessions[session_id]
+        active_sessions.set(len(self._sessions))
+
+    def create(self, version):
+        session_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, threading.Lock(), ScoringSession(version))
+            self._expire(now)
+        session_events.inc(event='created')
+        return session_id
+
+    def update(self, session_id, fn=None):
+        # Runs fn(session) under the session's lock; None if the session is gone
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1], entry[2])
+            self._sessions.move_to_end(session_id)
+        _, lock, session = entry
+        with lock:
+            if fn is not None:
+                fn(session)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+            active_sessions.set(len(self._sessions))
+        return removed
+
+
+class SQLiteAnswerPairs:
+    # The same view over the session_answers rows of one session, used inside
+    # the store's transaction: an update reads and writes only the rows for the
+    # questions posted and the schemas being re-summed. `schemas` is a bit mask
+    # of the schemas a row feeds.
+    def __init__(self, conn, session_id):
+        self._conn = conn
+        self._session_id = session_id
+
+    def previous(self, q_ids):
+        found = {}
+        q_ids = list(q_ids)
+        for start in range(0, len(q_ids), 500):  # stay under SQLite's parameter limit
+            chunk = q_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT q_id, pairs FROM session_answers WHERE session_id = ? "
+                f"AND q_id IN ({','.join('?' * len(chunk))})", [self._session_id, *chunk])
+            found.update((q_id, _decode_pairs(pairs)) for q_id, pairs in rows)
+        return found
+
+    def set(self, q_id, pairs):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO session_answers (session_id, q_id, schemas, pairs) VALUES (?, ?, ?, ?)",
+            (self._session_id, q_id, _schema_mask(s for s, _ in pairs),
+             json.dumps(pairs, separators=(',', ':'))))
+
+    def remove(self, q_id):
+        self._conn.execute("DELETE FROM session_answers WHERE session_id = ? AND q_id = ?",
+                           (self._session_id, q_id))
+
+    def touching(self, schemas):
+        rows = self._conn.execute(
+            "SELECT pairs FROM session_answers WHERE session_id = ? AND schemas & ? != 0",
+            (self._session_id, _schema_mask(schemas)))
+        return [_decode_pairs(pairs) for pairs, in rows]
+
+
+def _schema_mask(schemas):
+    mask = 0
+    for s in schemas:
+        mask |= 1 << s
+    return mask
+
+
+def _decode_pairs(text):
+    return tuple((int(s), amount) for s, amount in json.loads(text))
+
+
+class SQLiteSessionStore:
+    # Sessions in a SQLite file (WAL) so every worker process sees them: one
+    # session_totals row per session plus one session_answers row per answered
+    # question
+    PRUNE_EVERY = 500
+
+    def __init__(self, path, ttl=1800.0):
+        self.path = path
+        self.ttl = ttl
+        self._db = SQLiteConnections(path, [
+            "CREATE TABLE IF NOT EXISTS session_totals "
+            "(id TEXT PRIMARY KEY, version TEXT NOT NULL, totals TEXT NOT NULL, "
+            "answered INTEGER NOT NULL, last_used REAL NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS session_answers "
+            "(session_id TEXT NOT NULL, q_id TEXT NOT NULL, schemas INTEGER NOT NULL, pairs TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, q_id)) WITHOUT ROWID"])
+        self._creates = 0
+
+    def create(self, version):
+        session_id = secrets.token_urlsafe(16)
+        conn = self._db.get()
+        conn.execute("INSERT INTO session_totals (id, version, totals, answered, last_used) "
+                     "VALUES (?, ?, ?, 0, ?)",
+                     (session_id, version, json.dumps([0.0] * len(SCHEMA_NAMES)), time.time()))
+        self._creates += 1
+        if self._creates % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+        session_events.inc(event='created')
+        return session_id
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.ttl
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_answers WHERE session_id IN "
+                         "(SELECT id FROM session_totals WHERE last_used < ?)", (cutoff,))
+            cursor = conn.execute("DELETE FROM session_totals WHERE last_used < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        session_events.inc(cursor.rowcount, event='expired')
+
+    def update(self, session_id, fn=None):
+        conn = self._db.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version, totals, answered, last_used FROM session_totals "
+                               "WHERE id = ?", (session_id,)).fetchone()
+            if row is None or time.time() - row[3] > self.ttl:
+                conn.execute("COMMIT")
+                return None
+            session = ScoringSession(row[0], json.loads(row[1]), row[2],
+                                     SQLiteAnswerPairs(conn, session_id))
+            if fn is not None:
+                fn(session)
+            conn.execute("UPDATE session_totals SET totals = ?, answered = ?, last_used = ? WHERE id = ?",
+                         (json.dumps(session.totals), session.answered, time.time(), session_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return session
+
+    def delete(self, session_id):
+        conn = self._db.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_answers WHERE session_id = ?", (session_id,))
+            cursor = conn.execute("DELETE FROM session_totals WHERE id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount > 0
@@ -0,0 +1,33 @@
+import os
+import sqlite3
+import threading
+
+# -----------------------------
+# SHARED SQLITE FILES (result cache, sessions, norms)
+#
+# Every worker process opens the same file. WAL mode lets readers run
+# alongside the single writer; connections are in autocommit mode, so
+# stores open their own transactions (BEGIN IMMEDIATE) where they need one.
+# -----------------------------
+
+
+class SQLiteConnections:
+    # One connection per thread, reopened after fork: sqlite3 connections
+    # must not be shared across either
+    def __init__(self, path, schema=(), timeout=5):
+        self.path = path
+        self.schema = tuple(schema)  # CREATE statements run on every new connection
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.schema:
+                conn.execute(statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,192 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from instrumentation import REGISTRY
+
+# -----------------------------
+# SUBMISSION LOG (answers + results kept for analytics and audits)
+#
+# The request path only appends to a bounded in-memory queue and never
+# waits on storage: when the queue is full the submission is dropped and
+# counted. A background thread drains the queue and group-commits batches
+# of up to `batch_size` records, or whatever arrived within
+# `flush_interval` seconds, to SQLite (WAL) or an append-only JSONL file.
+# -----------------------------
+submissions_queued = REGISTRY.counter(
+    'lrs_submissions_queued_total', 'Submissions accepted into the write queue.')
+submissions_dropped = REGISTRY.counter(
+    'lrs_submissions_dropped_total', 'Submissions dropped because the write queue was full or closed.')
+submissions_written = REGISTRY.counter(
+    'lrs_submissions_written_total', 'Submissions committed to the submission store.')
+submission_write_failures = REGISTRY.counter(
+    'lrs_submission_write_failures_total', 'Submissions lost to a failed batch write.')
+submission_queue_depth = REGISTRY.gauge(
+    'lrs_submission_queue_depth', 'Submissions waiting in the write queue.')
+submission_batch_size = REGISTRY.histogram(
+    'lrs_submission_batch_size', 'Submissions per committed batch.', (),
+    (1, 10, 50, 100, 250, 500, 1000, 2500, 5000))
+submission_flush_duration = REGISTRY.histogram(
+    'lrs_submission_flush_seconds', 'Time to commit one batch of submissions.')
+
+_STOP = object()
+
+
+class SQLiteSubmissionSink:
+    # Only ever used from the writer thread, which owns the connection
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS submissions (id INTEGER PRIMARY KEY, "
+                         "submitted_at REAL NOT NULL, data_version TEXT NOT NULL, source TEXT NOT NULL, "
+                         "answers TEXT NOT NULL, result TEXT NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def write(self, records):
+        conn = self._connection()
+        with conn:  # one transaction per batch
+            conn.executemany(
+                "INSERT INTO submissions (submitted_at, data_version, source, answers, result) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(submitted_at, version, source, json.dumps(answers, sort_keys=True), _text(result))
+                 for submitted_at, version, source, answers, result in records])
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class JSONLSubmissionSink:
+    # One JSON object per line. Each batch is a single unbuffered append, so
+    # several worker processes can share the file without interleaving lines.
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, records):
+        lines = ''.join(json.dumps({
+            "submitted_at": submitted_at,
+            "data_version": version,
+            "source": source,
+            "answers": answers,
+            "result": json.loads(result),
+        }, sort_keys=True) + "\n" for submitted_at, version, source, answers, result in records)
+        with open(self.path, 'ab', buffering=0) as f:
+            f.write(lines.encode('utf-8'))
+            os.fsync(f.fileno())
+
+    def close(self):
+        pass
+
+
+def _text(result):
+    return result.decode('utf-8') if isinstance(result, (bytes, bytearray)) else result
+
+
+def open_submission_sink(path):
+    if path.lower().endswith('.jsonl'):
+        return JSONLSubmissionSink(path)
+    return SQLiteSubmissionSink(path)
+
+
+class SubmissionLog:
+    def __init__(self, sink, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.sink = sink
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, version, source, answers, result):
+        # Never blocks: `result` is the serialized response (str or bytes),
+        # encoding the answers is left to the writer thread
+        if self._closed:
+            submissions_dropped.inc()
+            return False
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), version, source, answers, result))
+        except queue.Full:
+            submissions_dropped.inc()
+            return False
+        submissions_queued.inc()
+        return True
+
+    def _start(self):
+        # Threads do not survive fork, so each worker process starts its own
+        # writer, with a fresh queue
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(target=self._run, name='submission-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        batch = []
+        flush_at = None
+        while True:
+            timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+            if record is _STOP:
+                self._write(batch)
+                self.sink.close()
+                return
+            if record is not None:
+                batch.append(record)
+                if flush_at is None:
+                    flush_at = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= flush_at):
+                self._write(batch)
+                batch = []
+                flush_at = None
+
+    def _write(self, batch):
+        submission_queue_depth.set(self._queue.qsize())
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            self.sink.write(batch)
+        except Exception as e:
+            submission_write_failures.inc(len(batch))
+            print(f"Submission write failed, {len(batch)} records lost: {e}")
+            return
+        submission_flush_duration.observe(time.perf_counter() - start)
+        submission_batch_size.observe(len(batch))
+        submissions_written.inc(len(batch))
+
+    def close(self, timeout=10.0):
+        # Stop accepting submissions, commit everything queued and stop the
+        # writer. Safe to call more than once.
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                return
+        # Everything queued before the sentinel is written first
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"Submission writer did not finish within {timeout}s, "
+                  f"{self._queue.qsize()} records left unwritten")
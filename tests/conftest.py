@@ -0,0 +1,29 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    # The app loads its data files relative to the working directory and
+    # reads its configuration from the environment at import time
+    cache_dir = tmp_path_factory.mktemp('lrs')
+    os.chdir(ROOT)
+    os.environ.update({
+        'DATA_RELOAD_INTERVAL': '0',
+        'DATA_CACHE_FILE': str(cache_dir / 'data_cache.bin'),
+        'SESSION_DB': '',
+        'NORMS_DB': '',
+        'NORMS_MIN_COUNT': '1000000000',  # no percentiles: results depend on answers only
+    })
+    return importlib.import_module('app')
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,26 @@
+import os
+
+import data_cache
+from conftest import ROOT
+from scoring import QUESTIONS_FILE, load_data_file
+
+
+def test_questions_payload_matches_jsonify(app_module):
+    df = load_data_file(os.path.join(ROOT, QUESTIONS_FILE))
+    expected = app_module.app.json.response(df.fillna('').to_dict(orient='records')).get_data()
+    assert data_cache.prepare_questions(df).variants['identity'] == expected
+
+
+def test_cached_snapshot_matches_compiled_one(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, 'DATA_CACHE_FILE', str(tmp_path / 'cache.bin'))
+    version = app_module.data_store.current.version
+    compiled = data_cache.compile_snapshot(version)
+    cached = data_cache.build_snapshot(version)
+    assert cached.schemas == compiled.schemas
+    assert cached.questions_payload.variants == compiled.questions_payload.variants
+    assert cached.questions_payload.etags == compiled.questions_payload.etags
+    assert cached.scoring_model.question_index == compiled.scoring_model.question_index
+    assert (cached.scoring_model.weights == compiled.scoring_model.weights).all()
+
+    # A cache for other data is ignored
+    assert data_cache.read_data_cache(data_cache.DATA_CACHE_FILE, 'other') is None
@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import random
+
+import pytest
+
+from bulk_score import score_chunk
+from conftest import ROOT
+from scoring import (
+    KEYWORDS_FILE, SCHEMA_NAMES, WEIGHT_MAP_FILE, KeywordMatcher, compile_scoring_model, fallback_keywords,
+    load_data_file, load_keyword_table, score_answers,
+)
+
+# The scoring engine has to stay equivalent to the original per-request
+# iterrows loop and any(kw in text) keyword test it replaced.
+
+WORDS = ("I feel lonely and abandoned shame perfection rigid special fail hurt bleak give in "
+         "my family was warm but distant").split()
+
+
+def reference_scores(weights_df, keyword_table, user_answers):
+    # The original /api/calculate loop, kept verbatim apart from the keyword
+    # table being passed in
+    scores = {}
+    for _, row in weights_df.iterrows():
+        q_id = str(row.get('Question ID', row.get('ID', ''))).strip()
+        schema_name = str(row.get('Schema Name', '')).strip()
+        weight = float(row.get('Weight', 1.0))
+        direction = str(row.get('SCORING LOGIC', '')).strip().lower()
+
+        if q_id in user_answers:
+            answer_value = user_answers[q_id]
+            if isinstance(answer_value, str):
+                text_lower = answer_value.lower()
+                for s_name, kws in keyword_table.items():
+                    if any(kw in text_lower for kw in kws):
+                        scores[s_name] = scores.get(s_name, 0) + weight * 4
+            else:
+                try:
+                    answer = float(answer_value)
+                except ValueError:
+                    continue
+                if 'reverse' in direction:
+                    answer = 5 - answer + 1
+                weighted = answer * weight
+                scores[schema_name] = scores.get(schema_name, 0) + weighted
+    return [scores.get(name, 0.0) for name in SCHEMA_NAMES]
+
+
+def random_answers(rng, question_ids):
+    # Numeric (including inf and NaN), boolean and free-text answers plus an
+    # unknown question. Numeric strings are left out: they now score as
+    # numbers, the old loop as text.
+    answers = {}
+    for q_id in question_ids:
+        r = rng.random()
+        if r < 0.1:
+            continue
+        if r < 0.2:
+            answers[q_id] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 20)))
+        elif r < 0.25:
+            answers[q_id] = rng.choice([True, 2.5, 0])
+        elif r < 0.26:
+            answers[q_id] = rng.choice([math.inf, -math.inf, math.nan])
+        else:
+            answers[q_id] = rng.randint(0, 4)
+    answers['999'] = 3
+    return answers
+
+
+def same_score(a, b):
+    return (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+@pytest.fixture(scope='module')
+def weights_df():
+    return load_data_file(os.path.join(ROOT, WEIGHT_MAP_FILE))
+
+
+@pytest.fixture(scope='module')
+def answer_sets(app_module):
+    question_ids = list(app_module.data_store.current.scoring_model.question_index)
+    rng = random.Random(1)
+    return [random_answers(rng, question_ids) for _ in range(60)]
+
+
+@pytest.mark.parametrize('keyword_table', ['fallback', 'csv'])
+def test_score_answers_matches_reference_loop(weights_df, keyword_table):
+    if keyword_table == 'fallback':
+        keyword_table = fallback_keywords
+    else:
+        keyword_table = load_keyword_table(load_data_file(os.path.join(ROOT, KEYWORDS_FILE)))
+    model = compile_scoring_model(weights_df, keyword_table)
+    rng = random.Random(0)
+    question_ids = list(model.question_index)
+    for _ in range(100):
+        answers = random_answers(rng, question_ids)
+        expected = reference_scores(weights_df, keyword_table, answers)
+        actual = score_answers(model, answers)
+        assert all(same_score(a, e) for a, e in zip(actual, expected)), answers
+
+
+def test_reverse_scoring_matches_reference_loop(weights_df):
+    # The shipped weight map has no SCORING LOGIC column, so nothing there is
+    # reversed; add one to cover the reverse path
+    rng = random.Random(0)
+    weights_df = weights_df.copy()
+    weights_df['SCORING LOGIC'] = [rng.choice(['Reverse', 'Direct', '']) for _ in range(len(weights_df))]
+    model = compile_scoring_model(weights_df, fallback_keywords)
+    question_ids = list(model.question_index)
+    for _ in range(50):
+        answers = random_answers(rng, question_ids)
+        expected = reference_scores(weights_df, fallback_keywords, answers)
+        actual = score_answers(model, answers)
+        assert all(same_score(a, e) for a, e in zip(actual, expected)), answers
+
+
+def test_keyword_matcher_matches_substring_tests():
+    # A tiny alphabet makes keywords overlap, nest and repeat
+    rng = random.Random(0)
+    alphabet = "ab c-"
+    for _ in range(500):
+        table = {}
+        for name in rng.sample(SCHEMA_NAMES, rng.randint(0, 6)):
+            table[name] = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                           for _ in range(rng.randint(1, 3))]
+        matcher = KeywordMatcher(table)
+        for _ in range(5):
+            text = "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 30)))
+            expected = {s for s, name in enumerate(SCHEMA_NAMES)
+                        if any(kw in text.lower() for kw in table.get(name, ()))}
+            assert matcher.match(text) == expected, (table, text)
+
+
+def _single(client, answers):
+    response = client.post('/api/calculate', json={"answers": answers})
+    assert response.status_code == 200
+    return response.get_json()['top_schemas']
+
+
+def test_batch_matches_single_requests(client, answer_sets):
+    body = "\n".join(json.dumps({"id": i, "answers": answers}) for i, answers in enumerate(answer_sets))
+    response = client.post('/api/calculate/batch', data=body, content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['id'] for line in lines] == list(range(len(answer_sets)))
+    for line, answers in zip(lines, answer_sets):
+        assert line['top_schemas'] == _single(client, answers)
+
+
+def test_bulk_score_matches_single_requests(client, app_module, answer_sets):
+    model = app_module.data_store.current.scoring_model
+    chunk = [(i, {"answers": answers}) for i, answers in enumerate(answer_sets)]
+    for line, answers in zip(score_chunk(chunk, model=model), answer_sets):
+        expected = [{k: v for k, v in schema.items() if k not in ('percentile', 'z_score')}
+                    for schema in _single(client, answers)]
+        assert json.loads(line)['top_schemas'] == expected
+
+
+def test_session_matches_single_requests(client, answer_sets):
+    rng = random.Random(2)
+    for answers in answer_sets[:20]:
+        session_id = client.post('/api/sessions').get_json()['session_id']
+        items = list(answers.items())
+        # Answer in several posts, changing some answers along the way
+        changed = {q_id: rng.randint(0, 4) for q_id, _ in rng.sample(items, min(5, len(items)))}
+        client.post(f'/api/sessions/{session_id}/answers', json={"answers": changed})
+        for start in range(0, len(items), 30):
+            response = client.post(f'/api/sessions/{session_id}/answers',
+                                   json={"answers": dict(items[start:start + 30])})
+            assert response.status_code == 200
+        assert response.get_json()['top_schemas'] == _single(client, answers)
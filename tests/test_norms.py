@@ -0,0 +1,149 @@
+import bisect
+import math
+import random
+import sqlite3
+import statistics
+
+import pytest
+
+from norms import NormSet, NormsStore, SchemaNorm, TDigest
+from scoring import SCHEMA_NAMES
+
+
+def exact_cdf(sorted_values, value):
+    # Fraction below value, ties counted half (the definition TDigest.cdf uses)
+    below = bisect.bisect_left(sorted_values, value)
+    ties = bisect.bisect_right(sorted_values, value) - below
+    return (below + ties / 2) / len(sorted_values)
+
+
+def sample(n, seed=0):
+    rng = random.Random(seed)
+    # Integer-valued scores with ties, like real schema scores
+    return [float(round(rng.gauss(20, 8))) for _ in range(n)]
+
+
+@pytest.mark.parametrize('n', [1, 10, 99])
+def test_cdf_is_exact_below_compression(n):
+    values = sample(n)
+    digest = TDigest(compression=100)
+    for value in values:
+        digest.add(value)
+    ordered = sorted(values)
+    for probe in sorted(set(values)) + [min(values) - 1, max(values) + 1, 20.5]:
+        assert digest.cdf(probe) == pytest.approx(exact_cdf(ordered, probe))
+
+
+@pytest.mark.parametrize('n', [150, 5000, 20000])
+def test_cdf_and_quantile_track_exact_ranks(n):
+    values = sample(n, seed=n)
+    digest = TDigest(compression=100)
+    for value in values:
+        digest.add(value)
+    ordered = sorted(values)
+    for probe in range(0, 41, 2):
+        assert abs(digest.cdf(probe) - exact_cdf(ordered, probe)) < 0.02
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        estimate = digest.quantile(q)
+        # The estimate has to sit at (about) rank q, allowing for the tie at that value
+        low = bisect.bisect_left(ordered, estimate) / n
+        high = bisect.bisect_right(ordered, estimate) / n
+        assert low - 0.02 <= q <= high + 0.02
+
+
+def test_quantile_of_few_points_stays_within_range():
+    digest = TDigest()
+    for value in (3.0, 1.0, 2.0):
+        digest.add(value)
+    assert digest.quantile(0.0) == 1.0
+    assert digest.quantile(1.0) == 3.0
+    assert digest.quantile(0.5) == pytest.approx(2.0)
+    assert TDigest().cdf(1.0) is None
+
+
+def test_schema_norm_merge_matches_single_pass():
+    values = sample(1000)
+    single = SchemaNorm()
+    for value in values:
+        single.add(value)
+
+    merged = SchemaNorm()
+    for start, end in ((0, 1), (1, 400), (400, 400), (400, 1000)):
+        part = SchemaNorm()
+        for value in values[start:end]:
+            part.add(value)
+        merged.merge(part)
+
+    assert merged.n == single.n == len(values)
+    assert merged.mean == pytest.approx(single.mean)
+    assert merged.m2 == pytest.approx(single.m2)
+    assert merged.std == pytest.approx(single.std)
+    assert merged.digest.count == pytest.approx(single.digest.count)
+
+
+def test_schema_norm_round_trips_through_json():
+    norm = SchemaNorm()
+    for value in sample(250):
+        norm.add(value)
+    copy = SchemaNorm.from_json(norm.to_json())
+    assert (copy.n, copy.mean, copy.m2) == (norm.n, norm.mean, norm.m2)
+    assert copy.digest.cdf(20.0) == pytest.approx(norm.digest.cdf(20.0))
+
+
+def test_describe_waits_for_min_count():
+    norm_set = NormSet('v1', min_count=10)
+    for i in range(9):
+        norm_set.observe([float(i)] * len(SCHEMA_NAMES))
+    assert norm_set.describe(0, 4.0) == (None, None)
+
+    norm_set.observe([9.0] * len(SCHEMA_NAMES))
+    percentile, z_score = norm_set.describe(0, 4.0)
+    assert percentile == 45.0  # 4 of 10 below, 1 tied
+    assert z_score == round((4.0 - 4.5) / statistics.stdev(range(10)), 2)
+    assert norm_set.describe(0, math.nan) == (None, None)
+
+
+def _stored_counts(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [SchemaNorm.from_json(state).n for state, in conn.execute(
+            "SELECT state FROM schema_norms WHERE version = 'v1' ORDER BY schema")]
+    finally:
+        conn.close()
+
+
+def test_failed_sync_keeps_observations(tmp_path, capsys):
+    path = str(tmp_path / 'norms.db')
+    store = NormsStore(path, min_count=1, flush_interval=3600)
+    store._db.timeout = 0.05
+    norm_set = NormSet('v1', min_count=1)  # not via get(): no background flusher
+    for i in range(5):
+        store.observe(norm_set, [[float(i)] * len(SCHEMA_NAMES)])
+    store.flush(norm_set)  # creates the table
+    for i in range(5, 8):
+        store.observe(norm_set, [[float(i)] * len(SCHEMA_NAMES)])
+
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        store.flush(norm_set)
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    assert "Norms flush failed" in capsys.readouterr().out
+    assert norm_set.delta[0].n == 3
+    assert _stored_counts(path) == [5] * len(SCHEMA_NAMES)
+
+    store.flush(norm_set)
+    assert norm_set.delta[0].n == 0
+    assert norm_set.view[0].n == 8
+    assert _stored_counts(path) == [8] * len(SCHEMA_NAMES)
+
+
+def test_close_merges_unflushed_observations(tmp_path):
+    path = str(tmp_path / 'norms.db')
+    store = NormsStore(path, min_count=1, flush_interval=3600)
+    norm_set = store.get('v1')
+    store.observe(norm_set, [[1.0] * len(SCHEMA_NAMES), [2.0] * len(SCHEMA_NAMES)])
+    store.close()
+    assert _stored_counts(path) == [2] * len(SCHEMA_NAMES)
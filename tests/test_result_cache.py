@@ -0,0 +1,79 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache, SQLiteCacheBackend, answers_key, pack_scores, unpack_scores
+
+
+@pytest.fixture(scope='module')
+def model(app_module):
+    return app_module.data_store.current.scoring_model
+
+
+@pytest.fixture(scope='module')
+def question_ids(model):
+    return list(model.question_index)[:3]
+
+
+def test_equivalent_numbers_share_a_key(model, question_ids):
+    q_id = question_ids[0]
+    keys = {answers_key(model, {q_id: value}, 'v1') for value in ("3", 3, 3.0, " 3 ")}
+    assert len(keys) == 1
+    assert answers_key(model, {q_id: 4}, 'v1') not in keys
+
+
+def test_text_keys_ignore_case(model, question_ids):
+    q_id = question_ids[0]
+    assert (answers_key(model, {q_id: "I Feel LONELY"}, 'v1')
+            == answers_key(model, {q_id: "i feel lonely"}, 'v1'))
+
+
+def test_key_ignores_order_and_unknown_questions(model, question_ids):
+    a, b, c = question_ids
+    key = answers_key(model, {a: 1, b: "text"}, 'v1')
+    assert answers_key(model, {b: "text", a: 1}, 'v1') == key
+    assert answers_key(model, {a: 1, 'no-such-question': 4, b: "text"}, 'v1') == key
+    assert answers_key(model, {a: 1, b: "text", c: 2}, 'v1') != key
+
+
+def test_new_data_version_changes_the_key(model, question_ids):
+    answers = {question_ids[0]: 2}
+    assert answers_key(model, answers, 'v1') != answers_key(model, answers, 'v2')
+
+
+def test_scores_round_trip():
+    scores = [1.5, 0.0, float('nan'), -2.25]
+    unpacked = unpack_scores(pack_scores(scores))
+    assert unpacked[:2].tolist() == [1.5, 0.0] and unpacked[3] == -2.25
+    assert unpacked[2] != unpacked[2]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'  # 'b' is now the least recently used
+    cache.put('c', b'3')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+    assert cache.get('c') == b'3'
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    cache = ResultCache(max_entries=10, ttl=30)
+    cache.put('a', b'1')
+    now[0] += 29
+    assert cache.get('a') == b'1'
+    now[0] += 2
+    assert cache.get('a') is None
+    assert len(cache._entries) == 0
+
+
+def test_shared_backend_fills_other_caches(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = ResultCache(backend=SQLiteCacheBackend(path, ttl=60, max_entries=10))
+    second = ResultCache(backend=SQLiteCacheBackend(path, ttl=60, max_entries=10))
+    first.put('a', b'1')
+    assert second.get('a') == b'1'
+    assert second.get('b') is None
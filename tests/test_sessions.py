@@ -0,0 +1,78 @@
+import math
+import random
+import sqlite3
+
+import pytest
+
+from scoring import score_answers
+from sessions import MemorySessionStore, SQLiteSessionStore
+from test_equivalence import random_answers, same_score
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemorySessionStore()
+    return SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+
+
+@pytest.fixture(scope='module')
+def model(app_module):
+    return app_module.data_store.current.scoring_model
+
+
+def test_overwritten_and_cleared_answers_match_a_fresh_score(store, model):
+    rng = random.Random(3)
+    question_ids = list(model.question_index)
+    for _ in range(10):
+        answers = random_answers(rng, question_ids)
+        session_id = store.create('v1')
+        # Answer some questions wrongly (or with text, NaN, inf) first, clear a
+        # few, then post the real answers in chunks
+        wrong = {q_id: rng.choice([0, 4, "lonely shame", math.nan, math.inf])
+                 for q_id in rng.sample(question_ids, 20)}
+        store.update(session_id, lambda session: session.apply(model, wrong))
+        cleared = dict.fromkeys(rng.sample(sorted(wrong), 5))
+        store.update(session_id, lambda session: session.apply(model, cleared))
+        items = list(answers.items())
+        for start in range(0, len(items), 25):
+            chunk = dict(items[start:start + 25])
+            store.update(session_id, lambda session: session.apply(model, chunk))
+        for q_id in set(wrong) - set(answers):
+            store.update(session_id, lambda session: session.apply(model, {q_id: None}))
+
+        session = store.update(session_id)
+        expected = score_answers(model, answers)
+        assert all(same_score(a, e) for a, e in zip(session.totals, expected)), answers
+        assert session.answered == len([q_id for q_id in answers if q_id in model.question_index])
+
+
+def test_sqlite_update_touches_only_the_posted_questions(tmp_path, model):
+    path = str(tmp_path / 'sessions.db')
+    store = SQLiteSessionStore(path)
+    session_id = store.create('v1')
+    question_ids = list(model.question_index)
+    store.update(session_id, lambda session: session.apply(model, dict.fromkeys(question_ids, 2)))
+
+    statements = []
+    store._db.get().set_trace_callback(statements.append)
+    store.update(session_id, lambda session: session.apply(model, {question_ids[0]: 3}))
+    reads = [s for s in statements if s.startswith('SELECT') and 'session_answers' in s]
+    writes = [s for s in statements if 'INTO session_answers' in s]
+    assert len(writes) == 1
+    assert all(question_ids[0] in s or 'schemas &' in s for s in reads)
+
+    conn = sqlite3.connect(path)
+    try:
+        (rows,) = conn.execute("SELECT count(*) FROM session_answers").fetchone()
+    finally:
+        conn.close()
+    assert rows == len(question_ids)
+
+
+def test_deleted_session_is_gone(store):
+    session_id = store.create('v1')
+    assert store.update(session_id).version == 'v1'
+    assert store.delete(session_id)
+    assert store.update(session_id) is None
+    assert not store.delete(session_id)